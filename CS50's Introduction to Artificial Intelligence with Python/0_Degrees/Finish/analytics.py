@@ -0,0 +1,183 @@
+"""
+Whole-graph separation statistics for a degrees dataset.
+
+Runs breadth-first searches from many sampled people in a process pool.
+Every worker maps the same binary snapshot (see snapshot.py) read-only, so
+the adjacency is shared through the page cache rather than copied into each
+process. Reports the distance histogram over all sampled pairs, eccentricity
+samples, an approximate diameter and throughput in traversals per second.
+A "Bacon number" histogram for one person is a single traversal from them.
+
+Usage: python analytics.py [--sources=N] [--workers=N] [--seed=N]
+                           [--center=NAME] directory
+"""
+
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+import snapshot
+from landmarks import bfs_distances, UNREACHABLE
+
+# Graph mapped by each worker process
+_graph = None
+
+
+def _init_worker(directory):
+    global _graph
+    _graph = snapshot.load(directory)
+    if _graph is None:
+        raise RuntimeError(f"no current snapshot in {directory}")
+
+
+def _traverse(sources):
+    """Runs `traverse` over the graph mapped by this worker."""
+    return traverse(_graph, sources)
+
+
+def traverse(graph, sources):
+    """
+    Runs a BFS from every person int in `sources`. Returns
+    (histogram, eccentricities) where histogram counts the other people
+    reached by distance and eccentricities holds (source, eccentricity,
+    farthest person) per source.
+    """
+    histogram = Counter()
+    eccentricities = []
+    for source in sources:
+        distances = bfs_distances(graph, source)
+        counts = Counter(distances)
+        counts.pop(UNREACHABLE, None)
+        eccentricity = max(counts)
+        farthest = distances.index(eccentricity)
+        eccentricities.append((source, eccentricity, farthest))
+        # The source itself is not a pair
+        counts.pop(0, None)
+        histogram.update(counts)
+    return histogram, eccentricities
+
+
+def analyze(directory, sources=100, workers=None, seed=0, batch=4):
+    """
+    Samples `sources` people from the largest component and runs a BFS
+    from each of them in `workers` processes (all cores if None).
+
+    Returns a dict with the distance histogram, eccentricities, an
+    approximate diameter and the traversal throughput.
+    """
+    graph = snapshot.load_or_build(directory)
+    sizes = graph.component_sizes
+    largest = max(range(len(sizes)), key=lambda c: sizes[c])
+    members = [p for p in range(graph.num_people())
+               if graph.component_of(p) == largest]
+    rng = random.Random(seed)
+    sample = rng.sample(members, min(sources, len(members)))
+    batches = [sample[i:i + batch] for i in range(0, len(sample), batch)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and snapshot.load(directory) is None:
+        # The snapshot could not be saved, so there is nothing for the
+        # workers to map
+        workers = 1
+    start = time.perf_counter()
+    histogram = Counter()
+    eccentricities = []
+    if workers == 1:
+        results = [traverse(graph, chunk) for chunk in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(directory,)) as pool:
+            results = list(pool.map(_traverse, batches))
+    for chunk_histogram, chunk_eccentricities in results:
+        histogram.update(chunk_histogram)
+        eccentricities.extend(chunk_eccentricities)
+    elapsed = time.perf_counter() - start
+
+    # Double sweep: the farthest person from the most eccentric source is
+    # usually near one end of a longest shortest path
+    source, eccentricity, farthest = max(eccentricities,
+                                         key=lambda e: e[1])
+    _, sweep, _ = traverse(graph, [farthest])[1][0]
+    return {
+        "component_size": len(members),
+        "traversals": len(sample),
+        "seconds": elapsed,
+        "traversals_per_second": len(sample) / elapsed if elapsed else 0,
+        "histogram": dict(sorted(histogram.items())),
+        "eccentricities": sorted(e for _, e, _ in eccentricities),
+        "diameter_lower_bound": max(eccentricity, sweep)
+    }
+
+
+def bacon_numbers(directory, person_id):
+    """
+    Returns a histogram of the distance from `person_id` to every person
+    they are connected to.
+    """
+    graph = snapshot.load_or_build(directory)
+    histogram = Counter(bfs_distances(graph, graph.person_index[person_id]))
+    histogram.pop(UNREACHABLE, None)
+    return dict(sorted(histogram.items()))
+
+
+def main():
+    usage = ("Usage: python analytics.py [--sources=N] [--workers=N] "
+             "[--seed=N] [--center=NAME] directory")
+    sources, workers, seed, center = 100, None, 0, None
+    positional = []
+    try:
+        for arg in sys.argv[1:]:
+            if arg.startswith("--sources="):
+                sources = int(arg.split("=", 1)[1])
+            elif arg.startswith("--workers="):
+                workers = int(arg.split("=", 1)[1])
+            elif arg.startswith("--seed="):
+                seed = int(arg.split("=", 1)[1])
+            elif arg.startswith("--center="):
+                center = arg.split("=", 1)[1]
+            elif arg.startswith("--"):
+                sys.exit(usage)
+            else:
+                positional.append(arg)
+    except ValueError:
+        sys.exit(usage)
+    if len(positional) != 1:
+        sys.exit(usage)
+    directory = positional[0]
+
+    stats = analyze(directory, sources, workers, seed)
+    print(f"Largest component: {stats['component_size']} people")
+    print(f"{stats['traversals']} traversals in {stats['seconds']:.2f} s "
+          f"({stats['traversals_per_second']:.1f} per second)")
+    print(f"Approximate diameter: >= {stats['diameter_lower_bound']}")
+    eccentricities = stats["eccentricities"]
+    print(f"Eccentricity: min {eccentricities[0]}, "
+          f"median {eccentricities[len(eccentricities) // 2]}, "
+          f"max {eccentricities[-1]}")
+    print_histogram("Separation between sampled pairs", stats["histogram"])
+
+    if center is not None:
+        degrees.load_data(directory, compact=True)
+        person_id = degrees.resolve_person(center)
+        if person_id is None:
+            sys.exit("Person not found.")
+        name = degrees.people[person_id]["name"]
+        print_histogram(f"{name} numbers",
+                        bacon_numbers(directory, person_id))
+
+
+def print_histogram(title, histogram):
+    total = sum(histogram.values())
+    print(f"{title}:")
+    for distance, count in histogram.items():
+        print(f"  {distance:>3}: {count:>10} ({100 * count / total:5.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Measures how degrees.py performs on a dataset: load time, peak memory and
+query latency for random pairs under each search strategy.
+
+Usage: python benchmark.py [--compact] [--no-snapshot] [--workers=N]
+                           [--queries=N] [--strategies=a,b] [--seed=N]
+                           directory
+
+Each run loads the data once, so compare load modes (dict vs --compact,
+with or without a snapshot) across separate runs.
+"""
+
+import random
+import resource
+import sys
+import time
+
+import degrees
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    if sys.platform == "darwin":
+        return peak / (1 << 20)
+    return peak / (1 << 10)
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def random_pairs(count, seed):
+    """
+    Returns `count` random (source, target) person_id pairs.
+    """
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    return [(rng.choice(person_ids), rng.choice(person_ids))
+            for _ in range(count)]
+
+
+def run_queries(pairs, strategy):
+    """
+    Answers every pair with `strategy`, returning the sorted latencies
+    in seconds and the number of connected pairs.
+    """
+    latencies = []
+    connected = 0
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, strategy=strategy)
+        latencies.append(time.perf_counter() - start)
+        if path is not None:
+            connected += 1
+    latencies.sort()
+    return latencies, connected
+
+
+def main():
+    compact = False
+    use_snapshot = True
+    workers = None
+    queries = 200
+    strategies = None
+    seed = 0
+    positional = []
+    usage = ("Usage: python benchmark.py [--compact] [--no-snapshot] "
+             "[--workers=N] [--queries=N] [--strategies=a,b] [--seed=N] "
+             "directory")
+    try:
+        for arg in sys.argv[1:]:
+            if arg == "--compact":
+                compact = True
+            elif arg == "--no-snapshot":
+                use_snapshot = False
+            elif arg.startswith("--workers="):
+                workers = int(arg.split("=", 1)[1])
+            elif arg.startswith("--queries="):
+                queries = int(arg.split("=", 1)[1])
+            elif arg.startswith("--strategies="):
+                strategies = arg.split("=", 1)[1].split(",")
+            elif arg.startswith("--seed="):
+                seed = int(arg.split("=", 1)[1])
+            elif arg.startswith("--"):
+                sys.exit(usage)
+            else:
+                positional.append(arg)
+    except ValueError:
+        sys.exit(usage)
+    if len(positional) != 1:
+        sys.exit(usage)
+    directory = positional[0]
+
+    if strategies is None:
+        strategies = [s for s in degrees.STRATEGIES
+                      if compact or s != "astar"]
+    for strategy in strategies:
+        if strategy not in degrees.STRATEGIES:
+            sys.exit(f"Unknown strategy {strategy}")
+    if "astar" in strategies and not compact:
+        sys.exit("The astar strategy needs --compact")
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact,
+                      use_snapshot=use_snapshot, workers=workers)
+    load_time = time.perf_counter() - start
+    print(f"load:      {load_time:.3f} s")
+
+    if "astar" in strategies:
+        start = time.perf_counter()
+        degrees.use_landmarks(directory)
+        print(f"landmarks: {time.perf_counter() - start:.3f} s")
+    print(f"peak RSS:  {peak_rss_mb():.1f} MiB "
+          f"({peak_rss_mb() - rss_before:+.1f} MiB for the data)")
+    print(f"people:    {len(degrees.people)}, movies: {len(degrees.movies)}")
+
+    pairs = random_pairs(queries, seed)
+    print()
+    print(f"{'strategy':<14}{'queries':>8}{'connected':>10}"
+          f"{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'q/s':>10}")
+    for strategy in strategies:
+        latencies, connected = run_queries(pairs, strategy)
+        total = sum(latencies)
+        print(f"{strategy:<14}{len(latencies):>8}{connected:>10}"
+              f"{1000 * percentile(latencies, 0.50):>10.3f}"
+              f"{1000 * percentile(latencies, 0.99):>10.3f}"
+              f"{1000 * latencies[-1]:>10.3f}"
+              f"{len(latencies) / total if total else 0:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 import csv
+import ingest
+import landmarks
+import nameindex
+import os
+import snapshot
 import sys
 import util
 
-from util import Node, StackFrontier, QueueFrontier
+from collections import deque
+from graph import Graph
+from util import Node, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,11 +20,77 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Maps person_ids to the id of their connected component
+components = {}
 
-def load_data(directory):
+# Number of people in each component, indexed by component id
+component_sizes = []
+
+# Components joined by apply_delta, as a union-find over component ids
+component_merges = util.DisjointSet()
+
+# Directory the data was loaded from, whose snapshot apply_delta updates
+data_directory = None
+
+# Integer-indexed CSR graph, set when data is loaded with compact=True
+graph = None
+
+# Landmark distance index over `graph`, set by use_landmarks
+landmark_index = None
+
+# Number of landmarks asked of use_landmarks, so the index can be rebuilt
+# once apply_delta has made it stale
+landmark_k = None
+
+# True once apply_delta has added rows that no journal on disk records
+unsaved_updates = False
+
+# Trigram/prefix index over `names`, built on first use by find_people
+name_index = None
+
+# (oldest, newest) known movie release years in `graph`, for recent_weight
+year_range = (0, 0)
+
+
+def load_data(directory, compact=False, use_snapshot=True, workers=None):
     """
     Load data from CSV files into memory.
+
+    If `workers` is given, stars.csv is split into chunks that are
+    parsed by that many processes.
+
+    With `compact` set, the data is held in a `graph.Graph` instead and
+    `names`, `people` and `movies` become read-only views over it. Unless
+    `use_snapshot` is False, the compact graph is then cached in a binary
+    snapshot next to the CSV files and mapped back in on later runs.
     """
+    global graph, names, people, movies, landmark_index, name_index
+    global components, component_sizes, component_merges, data_directory
+    global landmark_k, unsaved_updates, year_range
+
+    landmark_index = None
+    landmark_k = None
+    unsaved_updates = False
+    name_index = None
+    component_merges = util.DisjointSet()
+    data_directory = directory
+    if compact:
+        if use_snapshot:
+            graph = snapshot.load_or_build(directory, workers)
+        else:
+            graph = Graph.from_csv(directory, workers)
+        names = graph.names_view()
+        people = graph.people_view()
+        movies = graph.movies_view()
+        components = graph.components_view()
+        component_sizes = graph.component_sizes
+        year_range = (0, 0)
+        _extend_year_range(graph.movie_year_values)
+        return
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -42,25 +115,191 @@ def load_data(directory):
                 "stars": set()
             }
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    # Load stars, joining everyone in a movie's cast into one component
+    disjoint = util.DisjointSet()
+    for person_id in people:
+        disjoint.add(person_id)
+    first_star = {}
+    for person_id, movie_id in read_stars(directory, workers):
+        try:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        except KeyError:
+            continue
+        star = first_star.setdefault(movie_id, person_id)
+        disjoint.union(star, person_id)
+
+    components, component_sizes = disjoint.labels()
+
+    # Updates journaled by apply_delta next to a snapshot of this data
+    _apply_rows(*snapshot.read_journal(directory))
+
+
+def apply_delta(delta_directory):
+    """
+    Add the rows of the people.csv, movies.csv and stars.csv files in
+    `delta_directory` (any of which may be missing) to the loaded data,
+    without reloading it. Rows for existing ids are ignored. The rows are
+    also journaled next to the snapshot of the loaded data, if it has one.
+
+    Returns the set of ids of the components that gained people or
+    connections, as they are after the update; paths between people in
+    other components are unchanged.
+    """
+    global landmark_index, component_sizes, unsaved_updates
+
+    new_people, new_movies, new_stars = read_delta(delta_directory)
+    # People the update really adds, to be made findable by name
+    added = {}
+    for person_id, name, _ in new_people:
+        if person_id not in people:
+            added.setdefault(person_id, name)
+    if graph is not None:
+        num_movies = graph.num_movies()
+        touched = graph.apply(new_people, new_movies, new_stars)
+        # Mapped columns are replaced by growable ones on the first update
+        component_sizes = graph.component_sizes
+        _extend_year_range(graph.movie_year_values[num_movies:])
+    else:
+        touched = _apply_rows(new_people, new_movies, new_stars)
+
+    # Landmark distances may have shrunk; the landmark index is rebuilt by
+    # the next query that needs it
+    landmark_index = None
+    if name_index is not None:
+        for person_id, name in added.items():
+            name_index.add(name.lower(), person_id)
+    if (data_directory is not None
+            and os.path.exists(snapshot.path_for(data_directory))):
+        snapshot.append_journal(data_directory, new_people, new_movies,
+                                new_stars)
+    elif new_people or new_movies or new_stars:
+        unsaved_updates = True
+    return touched
+
+
+def read_delta(directory):
+    """
+    Returns (new_people, new_movies, new_stars) lists of row tuples read
+    from whichever of the CSV files exist in `directory`.
+    """
+    files = (("people.csv", ("id", "name", "birth")),
+             ("movies.csv", ("id", "title", "year")),
+             ("stars.csv", ("person_id", "movie_id")))
+    rows = []
+    for filename, fields in files:
+        try:
+            f = open(f"{directory}/{filename}", encoding="utf-8")
+        except FileNotFoundError:
+            rows.append([])
+            continue
+        with f:
+            reader = csv.DictReader(f)
+            rows.append([tuple(row[field] for field in fields)
+                         for row in reader])
+    return tuple(rows)
+
+
+def _apply_rows(new_people, new_movies, new_stars):
+    """Adds delta rows to the dicts loaded without compact=True."""
+    touched = set()
+    for person_id, name, birth in new_people:
+        if person_id in people:
+            continue
+        people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        names.setdefault(name.lower(), set()).add(person_id)
+        components[person_id] = len(component_sizes)
+        component_sizes.append(1)
+        touched.add(components[person_id])
+
+    for movie_id, title, year in new_movies:
+        if movie_id not in movies:
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+
+    for person_id, movie_id in new_stars:
+        if person_id not in people or movie_id not in movies:
+            continue
+        stars = movies[movie_id]["stars"]
+        if person_id in stars:
+            continue
+        touched.add(component_of(person_id))
+        if stars:
+            _merge_components(person_id, next(iter(stars)))
+        stars.add(person_id)
+        people[person_id]["movies"].add(movie_id)
+    return {component_root(label) for label in touched}
+
+
+def _merge_components(a, b):
+    """Joins the components of person_ids `a` and `b`."""
+    ca, cb = component_of(a), component_of(b)
+    if ca == cb:
+        return
+    component_merges.add(ca)
+    component_merges.add(cb)
+    root = component_merges.union(ca, cb)
+    other = cb if root == ca else ca
+    component_sizes[root] += component_sizes[other]
+    component_sizes[other] = 0
+
+
+def read_stars(directory, workers=None):
+    """
+    Yields (person_id, movie_id) pairs from stars.csv, parsed in
+    `workers` processes if given.
+    """
+    if workers is None:
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield row["person_id"], row["movie_id"]
+        return
+
+    # The workers return dense ints, positions in these lists
+    person_ids = list(people)
+    movie_ids = list(movies)
+    edge_people, edge_movies = ingest.read_stars(
+        f"{directory}/stars.csv",
+        {person_id: i for i, person_id in enumerate(person_ids)},
+        {movie_id: i for i, movie_id in enumerate(movie_ids)},
+        workers)
+    for p, m in zip(edge_people, edge_movies):
+        yield person_ids[p], movie_ids[m]
+
+
+# Search strategies understood by shortest_path
+STRATEGIES = ("bfs", "bidirectional", "astar", "bipartite")
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    strategy = "bfs"
+    workers = None
+    for arg in list(args):
+        if arg.startswith("--strategy="):
+            strategy = arg[len("--strategy="):]
+            args.remove(arg)
+        elif arg.startswith("--workers="):
+            try:
+                workers = int(arg[len("--workers="):])
+            except ValueError:
+                sys.exit("--workers must be a number")
+            args.remove(arg)
+    if strategy == "astar":
+        compact = True
+    if len(args) > 1 or strategy not in STRATEGIES:
+        sys.exit("Usage: python degrees.py [--compact] [--workers=N] "
+                 f"[--strategy={'|'.join(STRATEGIES)}] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=compact, workers=workers)
+    if strategy == "astar":
+        use_landmarks(directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -70,7 +309,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, strategy=strategy)
 
     if path is None:
         print("Not connected.")
@@ -85,18 +324,80 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, strategy="bfs", years=None, weight=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    `years` restricts the search to movies released between a (first, last)
+    pair of years, either of which may be None. `weight` makes it return
+    the cheapest path instead: it is "recent", which prefers recent movies,
+    or a function mapping a movie's release year to a positive cost. Both
+    need load_data(..., compact=True) and override `strategy`.
+
+    `strategy` is one of STRATEGIES: "bfs" searches outward from the source
+    only, "bidirectional" grows a search from each end until they meet,
+    "astar" runs A* guided by the landmark index (see use_landmarks) and
+    "bipartite" searches people and movies lazily, scanning each cast once.
+    "bidirectional" is the fastest. "astar" finds equally short paths but
+    is slower than even "bfs" on typical data, and is there to exercise
+    the landmark bounds rather than to speed queries up.
     """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown search strategy {strategy!r}")
+
+    if source != target and not connected(source, target):
+        return None
+
+    if years is not None or weight is not None:
+        if graph is None:
+            raise ValueError("years and weight need load_data(..., "
+                             "compact=True)")
+        first, last = years if years is not None else (None, None)
+        movie_weight = None
+        if weight is not None:
+            year_weight = recent_weight() if weight == "recent" else weight
+            year_values = graph.movie_year_values
+
+            def movie_weight(m):
+                return year_weight(year_values[m])
+        return compact_path_to_ids(graph.weighted_path(
+            graph.person_index[source], graph.person_index[target],
+            movie_weight, first, last))
+
+    if strategy == "astar":
+        if current_landmarks() is None:
+            raise ValueError("astar needs use_landmarks() to be called first")
+        return compact_path_to_ids(landmark_index.astar(
+            graph, graph.person_index[source], graph.person_index[target]))
+
+    if strategy == "bipartite":
+        if graph is None:
+            return bipartite_search(source, target, movies_for_person,
+                                    stars_for_movie)
+        path = bipartite_search(graph.person_index[source],
+                                graph.person_index[target],
+                                graph.movies_of, graph.stars_of)
+        return compact_path_to_ids(path)
+
+    if strategy == "bidirectional":
+        if graph is None:
+            return bidirectional_search(source, target, neighbors_for_person)
+        path = bidirectional_search(graph.person_index[source],
+                                    graph.person_index[target],
+                                    graph.neighbors)
+        return compact_path_to_ids(path)
+
+    if graph is not None:
+        return compact_path_to_ids(graph.shortest_path(
+            graph.person_index[source], graph.person_index[target]))
 
     # TODO
     # initializing frontier for he first state
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(start)
 
     explored = set()
@@ -125,15 +426,332 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def recent_weight(decade_cost=1):
+    """
+    Returns a weight for shortest_path that charges 1 for a movie from the
+    newest year in the data plus `decade_cost` for every decade before it.
+    Movies with no known year are charged as if they were the oldest.
+    """
+    oldest, newest = year_range
+
+    def weight(year):
+        return 1 + decade_cost * (newest - (year or oldest)) / 10
+    return weight
+
+
+def _extend_year_range(years):
+    """Widens `year_range` to cover the known years among `years`."""
+    global year_range
+    known = [year for year in years if year]
+    if not known:
+        return
+    oldest, newest = year_range
+    if oldest:
+        known.extend(year_range)
+    year_range = (min(known), max(known))
+
+
+def connected(source, target):
+    """
+    Returns True if a path exists between two person_ids,
+    using the component labels computed by load_data.
+    """
+    return component_of(source) == component_of(target)
+
+
+def component_of(person_id):
+    """Returns the id of the connected component of a person_id."""
+    return component_root(components[person_id])
+
+
+def component_root(label):
+    """Returns the id component `label` has been merged into, if any."""
+    if graph is not None:
+        return graph.component_root(label)
+    if label in component_merges.parent:
+        return component_merges.find(label)
+    return label
+
+
+def use_landmarks(directory, k=16):
+    """
+    Load the landmark index for the compact graph loaded from `directory`,
+    building it from `k` landmarks and saving it next to the CSV files
+    if there is no current one on disk. The index backs distance_estimate
+    and the "astar" strategy.
+    """
+    global landmark_index, landmark_k
+    if graph is None:
+        raise ValueError("landmarks need load_data(..., compact=True)")
+    landmark_index = landmarks.load_or_build(graph, directory, k)
+    landmark_k = k
+
+
+def current_landmarks():
+    """
+    Returns the landmark index, first rebuilding it if apply_delta has
+    dropped it, or None if use_landmarks was never called.
+    """
+    global landmark_index
+    if landmark_index is None and landmark_k is not None:
+        if unsaved_updates:
+            # The index on disk, if any, describes other data
+            landmark_index = landmarks.LandmarkIndex.build(graph, landmark_k)
+        else:
+            landmark_index = landmarks.load_or_build(graph, data_directory,
+                                                     landmark_k)
+    return landmark_index
+
+
+def distance_estimate(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between two
+    person_ids from the landmark index alone, or None if they are known
+    not to be connected. `upper` is None if no landmark reaches them.
+    """
+    if current_landmarks() is None:
+        raise ValueError("distance_estimate needs use_landmarks() first")
+    return landmark_index.estimate(graph.person_index[source],
+                                   graph.person_index[target])
+
+
+def bipartite_search(source, target, movies_of, stars_of):
+    """
+    Breadth-first search over the person-movie bipartite graph, where
+    `movies_of(person)` and `stars_of(movie)` give its edges.
+
+    Returns the shortest list of (movie, person) pairs from `source` to
+    `target`, or None if they are not connected.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie, person) that reached it
+    parents = {source: None}
+    seen_movies = set()
+    frontier = deque([source])
+    while frontier:
+        person = frontier.popleft()
+        for movie, star in lazy_neighbors(person, seen_movies,
+                                          movies_of, stars_of):
+            if star in parents:
+                continue
+            parents[star] = (movie, person)
+            if star == target:
+                path = []
+                while parents[star] is not None:
+                    movie, parent = parents[star]
+                    path.append((movie, star))
+                    star = parent
+                path.reverse()
+                return path
+            frontier.append(star)
+    return None
+
+
+def distances_from(source, targets, paths=False):
+    """
+    Returns a dict mapping each person_id in `targets` to its degrees of
+    separation from `source`, or None if they are not connected, using a
+    single breadth-first search that stops once every target is reached.
+
+    With `paths` set, the dict maps each target to its shortest list of
+    (movie_id, person_id) pairs instead, or None if not connected.
+    """
+    targets = set(targets)
+    results = {target: None for target in targets}
+
+    # Targets in another component can never be reached
+    pending = {target for target in targets if connected(source, target)}
+
+    if graph is None:
+        start, movies_of, stars_of = source, movies_for_person, stars_for_movie
+        wanted = set(pending)
+    else:
+        start = graph.person_index[source]
+        movies_of, stars_of = graph.movies_of, graph.stars_of
+        wanted = {graph.person_index[target] for target in pending}
+
+    # Maps each reached person to the (movie, person) that reached it
+    parents = {start: None}
+    depth = {}
+    if start in wanted:
+        depth[start] = 0
+        wanted.discard(start)
+
+    seen_movies = set()
+    frontier = [start]
+    level = 0
+    while frontier and wanted:
+        level += 1
+        next_frontier = []
+        for person in frontier:
+            for movie, star in lazy_neighbors(person, seen_movies,
+                                              movies_of, stars_of):
+                if star in parents:
+                    continue
+                parents[star] = (movie, person)
+                next_frontier.append(star)
+                if star in wanted:
+                    depth[star] = level
+                    wanted.discard(star)
+        frontier = next_frontier
+
+    for target in pending:
+        person = target if graph is None else graph.person_index[target]
+        if person not in depth:
+            continue
+        if not paths:
+            results[target] = depth[person]
+            continue
+        path = []
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+        results[target] = (path if graph is None
+                           else compact_path_to_ids(path))
+    return results
+
+
+def lazy_neighbors(person, seen_movies, movies_of, stars_of):
+    """
+    Yields (movie, person) pairs for people who starred with `person`,
+    skipping movies in `seen_movies` and adding every movie it expands,
+    so a search scans each cast at most once.
+    """
+    for movie in movies_of(person):
+        if movie in seen_movies:
+            continue
+        seen_movies.add(movie)
+        for star in stars_of(movie):
+            yield movie, star
+
+
+def movies_for_person(person_id):
+    """Returns the movie_ids a person starred in."""
+    return people[person_id]["movies"]
+
+
+def stars_for_movie(movie_id):
+    """Returns the person_ids who starred in a movie."""
+    return movies[movie_id]["stars"]
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Returns the shortest list of (action, state) pairs from `source` to
+    `target`, where `neighbors(state)` yields (action, state) pairs of an
+    undirected graph, or None if they are not connected.
+
+    Searches level by level from both ends, always expanding the smaller
+    frontier. Each side keeps a parent dict, so membership tests are O(1).
+    """
+    if source == target:
+        return []
+
+    # Maps each visited state to its (action, parent state) on that side
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        # Expand the whole level, keeping the meeting point that
+        # gives the shortest overall path
+        next_frontier = []
+        meeting = None
+        best = None
+        for state in frontier:
+            for action, neighbor in neighbors(state):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (action, state)
+                if neighbor in others:
+                    length = (_depth(parents, neighbor)
+                              + _depth(others, neighbor))
+                    if best is None or length < best:
+                        meeting, best = neighbor, length
+                next_frontier.append(neighbor)
+
+        if meeting is not None:
+            return _join(forward, backward, meeting)
+
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _depth(parents, state):
+    """Counts the steps from `state` back to the root of `parents`."""
+    depth = 0
+    while parents[state] is not None:
+        state = parents[state][1]
+        depth += 1
+    return depth
+
+
+def _join(forward, backward, meeting):
+    """
+    Builds the (action, state) path through `meeting` out of the
+    forward and backward parent dicts.
+    """
+    path = []
+    state = meeting
+    while forward[state] is not None:
+        action, parent = forward[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+
+    # Backward edges are walked towards the target, so each action
+    # leads to the parent state rather than the child
+    state = meeting
+    while backward[state] is not None:
+        action, parent = backward[state]
+        path.append((action, parent))
+        state = parent
+    return path
+
+
+def compact_path_to_ids(path):
+    """
+    Maps a path of (movie, person) ints from the integer graph
+    back to (movie_id, person_id) pairs.
+    """
+    if path is None:
+        return None
+    return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
+
+
+def person_id_for_name(name, interactive=True, birth=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If `birth` is given, only people born that year match. If `interactive`
+    is False, ambiguous names return None instead of prompting for the
+    intended person.
     """
     person_ids = list(names.get(name.lower(), set()))
+    if birth is not None:
+        person_ids = [person_id for person_id in person_ids
+                      if people[person_id]["birth"] == str(birth)]
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not interactive:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -151,11 +769,56 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(query, limit=10):
+    """
+    Returns up to `limit` (person_id, name, rank, score) candidates for a
+    full, partial or misspelled name, best first (see nameindex.NameIndex).
+    """
+    global name_index
+    if name_index is None:
+        name_index = nameindex.NameIndex(names)
+    return name_index.search(query, limit)
+
+
+def resolve_person(query, birth=None):
+    """
+    Returns the single best person_id for a name without prompting,
+    or None if nothing matches.
+
+    Exact matches win over partial and fuzzy ones (see find_people).
+    Among equally good matches, people born in `birth` (if given) are
+    preferred, then the person who starred in the most movies.
+    """
+    person_ids = list(names.get(" ".join(query.lower().split()), ()))
+    if not person_ids:
+        candidates = find_people(query)
+        if not candidates:
+            return None
+        best_rank = candidates[0][2]
+        best_score = candidates[0][3]
+        person_ids = [person_id for person_id, _, rank, score in candidates
+                      if rank == best_rank and score == best_score]
+
+    if birth is not None:
+        born = [person_id for person_id in person_ids
+                if people[person_id]["birth"] == str(birth)]
+        if born:
+            person_ids = born
+    return max(person_ids, key=lambda person_id: (
+        len(people[person_id]["movies"]), person_id))
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[m], graph.person_ids[p])
+            for m, p in graph.neighbors(graph.person_index[person_id])
+        }
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
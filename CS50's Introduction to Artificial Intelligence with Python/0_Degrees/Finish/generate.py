@@ -0,0 +1,135 @@
+"""
+Writes a synthetic people/movies/stars dataset in the layout of the
+IMDb data used by degrees.py.
+
+Cast sizes follow a Pareto distribution and actors are picked with
+Zipf-like popularity, so a few actors appear in a great many movies while
+most appear in one or two, as in the real data.
+
+Usage: python generate.py directory [stars] [seed]
+"""
+
+import csv
+import itertools
+import os
+import random
+import sys
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Emma",
+    "Noah", "Olivia", "Liam", "Ava", "Lucas", "Mia", "Hugo", "Chloe", "Kenji"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez",
+    "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark",
+    "Ramirez", "Lewis", "Robinson", "Walker", "Young", "Allen", "King"
+]
+TITLE_WORDS = [
+    "Night", "Return", "City", "Last", "Dark", "Love", "Road", "House",
+    "Secret", "River", "Star", "Summer", "Island", "Shadow", "Fire", "Blue",
+    "Empire", "Heart", "Storm", "Garden", "Silent", "Golden", "Wild", "Ghost"
+]
+
+# Average cast size and movies per actor; sizes are derived from the
+# requested number of star rows
+MEAN_CAST = 4
+STARS_PER_PERSON = 3
+MAX_CAST = 200
+
+# Exponent of the popularity law; 1 would be classic Zipf, lower values
+# leave fewer people without any movie
+POPULARITY_EXPONENT = 0.6
+
+
+def generate(directory, stars=100000, seed=0):
+    """
+    Write people.csv, movies.csv and stars.csv with about `stars`
+    star rows into `directory`.
+    """
+    rng = random.Random(seed)
+    num_people = max(2, stars // STARS_PER_PERSON)
+    num_movies = max(1, stars // MEAN_CAST)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for p in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            # Like the real data, some people have no birth year
+            birth = "" if rng.random() < 0.1 else rng.randint(1900, 2010)
+            writer.writerow([person_id(p), name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for m in range(num_movies):
+            title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+            writer.writerow([movie_id(m), title, rng.randint(1920, 2020)])
+
+    # Zipf-like popularity: the person of rank r is picked with weight
+    # r ** -POPULARITY_EXPONENT, shuffled so popularity is unrelated to id
+    ranks = list(range(1, num_people + 1))
+    rng.shuffle(ranks)
+    cum_weights = list(itertools.accumulate(
+        r ** -POPULARITY_EXPONENT for r in ranks))
+    population = range(num_people)
+
+    written = 0
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for m in range(num_movies):
+            remaining_movies = num_movies - m
+            mean = (stars - written) / remaining_movies
+            size = cast_size(rng, mean)
+            cast = set(rng.choices(population, cum_weights=cum_weights,
+                                   k=size))
+            for p in cast:
+                writer.writerow([person_id(p), movie_id(m)])
+            written += len(cast)
+    return num_people, num_movies, written
+
+
+def cast_size(rng, mean):
+    """
+    Draws a Pareto-distributed cast size with the given mean.
+    """
+    alpha = 2.0
+    scale = max(mean, 1) * (alpha - 1) / alpha
+    size = int(round(scale * rng.paretovariate(alpha)))
+    return max(1, min(MAX_CAST, size))
+
+
+def person_id(p):
+    return str(p + 1)
+
+
+def movie_id(m):
+    return str(m + 1000001)
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 4:
+        sys.exit("Usage: python generate.py directory [stars] [seed]")
+    directory = sys.argv[1]
+    try:
+        stars = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+        seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    except ValueError:
+        sys.exit("stars and seed must be numbers")
+
+    people, movies, written = generate(directory, stars, seed)
+    print(f"Wrote {people} people, {movies} movies "
+          f"and {written} stars to {directory}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,711 @@
+"""
+Compact, integer-indexed representation of the degrees data.
+
+People and movies are mapped to dense ints (their row order in the CSV files)
+and the person <-> movie incidence is stored twice in CSR form:
+
+    person_offsets[p] .. person_offsets[p + 1]  slice of person_movies
+    movie_offsets[m]  .. movie_offsets[m + 1]   slice of movie_stars
+
+Everything numeric lives in `array.array` buffers, so the whole graph is a
+handful of flat allocations instead of one dict and one set per record.
+Each person's slice of person_movies is ordered by release year, so the
+movies of a year range can be found by binary search.
+
+Rows added later with `Graph.apply` are kept in small overlay dicts next
+to the CSR arrays, so updates cost time proportional to the delta.
+"""
+
+import csv
+import heapq
+import math
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import chain
+
+import ingest
+import util
+
+
+class Graph():
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 component=None, component_sizes=None,
+                 movie_year_values=None):
+        """
+        Build a graph from already laid out columns.
+        Use `Graph.from_csv` to load one from a data directory.
+
+        `component` maps each person int to a connected component id and
+        `component_sizes` holds the number of people in each component;
+        both are computed from the movie casts when not given.
+        `movie_year_values` holds each movie's year as an int (0 if
+        unknown) and is parsed from `movie_years` when not given.
+        """
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self._person_index = None
+        self._movie_index = None
+
+        # Edges added by `apply`, on top of the CSR arrays
+        self.extra_person_movies = {}
+        self.extra_movie_stars = {}
+
+        # Components merged by `apply`, as a union-find over component ids
+        self.component_merges = util.DisjointSet()
+
+        if component is None:
+            component = label_components(self.num_people(),
+                                         movie_offsets, movie_stars)
+        if component_sizes is None:
+            component_sizes = array("i", [0]) * (max(component, default=-1)
+                                                 + 1)
+            for c in component:
+                component_sizes[c] += 1
+        self.component = component
+        self.component_sizes = component_sizes
+
+        if movie_year_values is None:
+            movie_year_values = array("i", map(parse_year, movie_years))
+        self.movie_year_values = movie_year_values
+
+    @classmethod
+    def from_csv(cls, directory, workers=None):
+        """
+        Load people, movies and stars CSV files from `directory`.
+        If `workers` is given, stars.csv is parsed by that many processes.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+
+        # Collect (person, movie) edges as two parallel int arrays
+        if workers is not None:
+            edge_people, edge_movies = ingest.read_stars(
+                f"{directory}/stars.csv", person_index, movie_index, workers)
+        else:
+            edge_people = array("i")
+            edge_movies = array("i")
+            with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    try:
+                        p = person_index[row["person_id"]]
+                        m = movie_index[row["movie_id"]]
+                    except KeyError:
+                        continue
+                    edge_people.append(p)
+                    edge_movies.append(m)
+
+        movie_offsets, movie_stars = build_csr(
+            len(movie_ids), edge_movies, edge_people)
+
+        # Re-emit the edges in release order; the counting sort is stable,
+        # so every person's movies come out sorted by year
+        movie_year_values = array("i", map(parse_year, movie_years))
+        edge_people = array("i")
+        edge_movies = array("i")
+        for m in sorted(range(len(movie_ids)),
+                        key=movie_year_values.__getitem__):
+            for i in range(movie_offsets[m], movie_offsets[m + 1]):
+                edge_people.append(movie_stars[i])
+                edge_movies.append(m)
+        person_offsets, person_movies = build_csr(
+            len(person_ids), edge_people, edge_movies)
+
+        graph = cls(person_ids, person_names, person_births,
+                    movie_ids, movie_titles, movie_years,
+                    person_offsets, person_movies, movie_offsets, movie_stars,
+                    movie_year_values=movie_year_values)
+        graph._person_index = person_index
+        graph._movie_index = movie_index
+        return graph
+
+    @property
+    def person_index(self):
+        """Maps person_id strings to dense person ints."""
+        if self._person_index is None:
+            self._person_index = {
+                pid: i for i, pid in enumerate(self.person_ids)
+            }
+        return self._person_index
+
+    @property
+    def movie_index(self):
+        """Maps movie_id strings to dense movie ints."""
+        if self._movie_index is None:
+            self._movie_index = {
+                mid: i for i, mid in enumerate(self.movie_ids)
+            }
+        return self._movie_index
+
+    def num_people(self):
+        return len(self.person_ids)
+
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def component_of(self, p):
+        """Returns the id of the connected component of person int `p`."""
+        return self.component_root(self.component[p])
+
+    def component_root(self, c):
+        """Returns the id component `c` has been merged into, if any."""
+        if c in self.component_merges.parent:
+            return self.component_merges.find(c)
+        return c
+
+    def connected(self, a, b):
+        """Returns True if person ints `a` and `b` share a component."""
+        return self.component_of(a) == self.component_of(b)
+
+    def movies_of(self, p):
+        """Returns the movie ints person `p` starred in."""
+        offsets = self.person_offsets
+        if p + 1 < len(offsets):
+            movies = self.person_movies[offsets[p]:offsets[p + 1]]
+        else:
+            movies = []
+        if p in self.extra_person_movies:
+            return list(chain(movies, self.extra_person_movies[p]))
+        return movies
+
+    def movies_in_years(self, p, first=None, last=None):
+        """
+        Returns the movie ints person `p` starred in that were released
+        between years `first` and `last` inclusive; None leaves that end
+        of the range open.
+        """
+        years = self.movie_year_values.__getitem__
+        if p + 1 < len(self.person_offsets):
+            start, end = self.person_offsets[p], self.person_offsets[p + 1]
+            if first is not None:
+                start = self._year_bound(start, end, first - 1)
+            if last is not None:
+                end = self._year_bound(start, end, last)
+            movies = self.person_movies[start:end]
+        else:
+            movies = []
+        if p in self.extra_person_movies:
+            extra = [m for m in self.extra_person_movies[p]
+                     if (first is None or years(m) >= first)
+                     and (last is None or years(m) <= last)]
+            return list(chain(movies, extra))
+        return movies
+
+    def _year_bound(self, start, end, year):
+        """
+        Returns the first position between `start` and `end` in
+        person_movies of a movie released after `year`, by binary search.
+        """
+        movies = self.person_movies
+        years = self.movie_year_values
+        while start < end:
+            middle = (start + end) // 2
+            if years[movies[middle]] <= year:
+                start = middle + 1
+            else:
+                end = middle
+        return start
+
+    def stars_of(self, m):
+        """Returns the person ints who starred in movie `m`."""
+        offsets = self.movie_offsets
+        if m + 1 < len(offsets):
+            stars = self.movie_stars[offsets[m]:offsets[m + 1]]
+        else:
+            stars = []
+        if m in self.extra_movie_stars:
+            return list(chain(stars, self.extra_movie_stars[m]))
+        return stars
+
+    def neighbors(self, p):
+        """
+        Yields (movie, person) int pairs for everyone who
+        starred in a movie with person `p`, `p` included.
+        """
+        for m in self.movies_of(p):
+            for q in self.stars_of(m):
+                yield m, q
+
+    def apply(self, new_people=(), new_movies=(), new_stars=()):
+        """
+        Adds rows to the graph in place: `new_people` as (id, name, birth),
+        `new_movies` as (id, title, year) and `new_stars` as
+        (person_id, movie_id) tuples. Rows for existing ids, stars naming
+        unknown ids and duplicate stars are ignored.
+
+        Returns the set of ids of the components that gained people or
+        edges, as they are after the update.
+        """
+        # A mapped snapshot stays untouched, and its ids undecoded, until
+        # some row needs them
+        if not (new_people or new_movies or new_stars):
+            return set()
+
+        touched = set()
+        person_index = self.person_index
+        for person_id, name, birth in new_people:
+            if person_id in person_index:
+                continue
+            self._make_growable("person_ids", "person_names",
+                                "person_births", "component",
+                                "component_sizes")
+            p = len(self.person_ids)
+            person_index[person_id] = p
+            self.person_ids.append(person_id)
+            self.person_names.append(name)
+            self.person_births.append(birth)
+            self.component.append(len(self.component_sizes))
+            self.component_sizes.append(1)
+            touched.add(self.component[p])
+
+        movie_index = self.movie_index
+        for movie_id, title, year in new_movies:
+            if movie_id in movie_index:
+                continue
+            self._make_growable("movie_ids", "movie_titles", "movie_years",
+                                "movie_year_values")
+            movie_index[movie_id] = len(self.movie_ids)
+            self.movie_ids.append(movie_id)
+            self.movie_titles.append(title)
+            self.movie_years.append(year)
+            self.movie_year_values.append(parse_year(year))
+
+        for person_id, movie_id in new_stars:
+            try:
+                p = person_index[person_id]
+                m = movie_index[movie_id]
+            except KeyError:
+                continue
+            stars = self.stars_of(m)
+            if p in stars:
+                continue
+            self.extra_person_movies.setdefault(p, []).append(m)
+            self.extra_movie_stars.setdefault(m, []).append(p)
+
+            touched.add(self.component_of(p))
+            if stars:
+                self._merge_components(p, stars[0])
+        return {self.component_root(c) for c in touched}
+
+    def _make_growable(self, *names):
+        """Wraps the named columns that cannot grow in GrowableColumn."""
+        for name in names:
+            column = getattr(self, name)
+            if not hasattr(column, "append"):
+                setattr(self, name, GrowableColumn(column))
+
+    def _merge_components(self, a, b):
+        """Joins the components of person ints `a` and `b`."""
+        ca, cb = self.component_of(a), self.component_of(b)
+        if ca == cb:
+            return
+        self._make_growable("component_sizes")
+        merges = self.component_merges
+        merges.add(ca)
+        merges.add(cb)
+        root = merges.union(ca, cb)
+        other = cb if root == ca else ca
+        self.component_sizes[root] += self.component_sizes[other]
+        self.component_sizes[other] = 0
+
+    def shortest_path(self, source, target):
+        """
+        Breadth-first search between person ints `source` and `target`.
+
+        Returns the list of (movie, person) int pairs leading from the
+        source to the target, or None if they are not connected.
+        """
+        if source == target:
+            return []
+        if not self.connected(source, target):
+            return None
+
+        # parent_person[p] == -1 marks p as unvisited
+        parent_person = array("i", [-1]) * self.num_people()
+        parent_movie = array("i", [-1]) * self.num_people()
+        parent_person[source] = source
+
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for m, q in self.neighbors(p):
+                    if parent_person[q] != -1:
+                        continue
+                    parent_person[q] = p
+                    parent_movie[q] = m
+                    if q == target:
+                        return self._unwind(target, parent_person,
+                                            parent_movie)
+                    next_frontier.append(q)
+            frontier = next_frontier
+        return None
+
+    def year_path(self, source, target, first=None, last=None):
+        """
+        Breadth-first search between person ints `source` and `target`
+        using only movies released between years `first` and `last`.
+
+        Returns the list of (movie, person) int pairs leading from the
+        source to the target, or None if they are not connected that way.
+        """
+        return self.weighted_path(source, target, None, first, last)
+
+    def weighted_path(self, source, target, weight, first=None, last=None):
+        """
+        Dijkstra search between person ints `source` and `target`, where
+        going through movie `m` costs `weight(m)` (which must be positive)
+        and only movies released between years `first` and `last` are used.
+        With `weight` None every movie costs 1 and a plain BFS is run.
+
+        Returns the cheapest list of (movie, person) int pairs leading
+        from the source to the target, or None if there is none.
+        """
+        if source == target:
+            return []
+        if not self.connected(source, target):
+            return None
+
+        n = self.num_people()
+        parent_person = array("i", [-1]) * n
+        parent_movie = array("i", [-1]) * n
+        parent_person[source] = source
+        # Every movie's cast is relaxed once, from the first (cheapest)
+        # person popped who starred in it
+        seen_movies = bytearray(self.num_movies())
+
+        if weight is None:
+            frontier = [source]
+            while frontier:
+                next_frontier = []
+                for p in frontier:
+                    for m in self.movies_in_years(p, first, last):
+                        if seen_movies[m]:
+                            continue
+                        seen_movies[m] = 1
+                        for q in self.stars_of(m):
+                            if parent_person[q] != -1:
+                                continue
+                            parent_person[q] = p
+                            parent_movie[q] = m
+                            if q == target:
+                                return self._unwind(target, parent_person,
+                                                    parent_movie)
+                            next_frontier.append(q)
+                frontier = next_frontier
+            return None
+
+        cost = array("d", [math.inf]) * n
+        cost[source] = 0
+        heap = [(0, source)]
+        while heap:
+            c, p = heapq.heappop(heap)
+            if c > cost[p]:
+                continue
+            if p == target:
+                return self._unwind(target, parent_person, parent_movie)
+            for m in self.movies_in_years(p, first, last):
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                new_cost = c + weight(m)
+                for q in self.stars_of(m):
+                    if new_cost < cost[q]:
+                        cost[q] = new_cost
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        heapq.heappush(heap, (new_cost, q))
+        return None
+
+    @staticmethod
+    def _unwind(p, parent_person, parent_movie):
+        """Follows parent arrays from `p` back to the search root."""
+        path = []
+        while parent_person[p] != p:
+            path.append((parent_movie[p], p))
+            p = parent_person[p]
+        path.reverse()
+        return path
+
+    def people_view(self):
+        """Read-only stand-in for the `people` dict of degrees.py."""
+        return PeopleView(self)
+
+    def movies_view(self):
+        """Read-only stand-in for the `movies` dict of degrees.py."""
+        return MoviesView(self)
+
+    def names_view(self):
+        """Read-only stand-in for the `names` dict of degrees.py."""
+        return NamesView(self)
+
+    def components_view(self):
+        """Read-only stand-in for the `components` dict of degrees.py."""
+        return ComponentsView(self)
+
+
+class GrowableColumn(Sequence):
+    """
+    Appendable sequence over a read-only column, such as a mapped
+    snapshot section; new items are kept in a list after it.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.extra = []
+        self._copied = False
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i < len(self.base):
+            return self.base[i]
+        return self.extra[i - len(self.base)]
+
+    def __setitem__(self, i, value):
+        if i < 0:
+            i += len(self)
+        if i < len(self.base):
+            # Mapped sections are read-only, so the base is copied on the
+            # first write to it
+            if not self._copied:
+                self.base = list(self.base)
+                self._copied = True
+            self.base[i] = value
+        else:
+            self.extra[i - len(self.base)] = value
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def __iter__(self):
+        return chain(self.base, self.extra)
+
+    def append(self, value):
+        self.extra.append(value)
+
+
+def parse_year(year):
+    """Returns a year string as an int, or 0 if it is not a number."""
+    try:
+        return int(year)
+    except ValueError:
+        return 0
+
+
+def label_components(num_people, movie_offsets, movie_stars):
+    """
+    Returns an array labelling every person int with a dense component id,
+    using union-find over the casts of each movie.
+    """
+    parent = array("i", range(num_people))
+
+    def find(p):
+        while parent[p] != p:
+            parent[p] = parent[parent[p]]
+            p = parent[p]
+        return p
+
+    for m in range(len(movie_offsets) - 1):
+        start, end = movie_offsets[m], movie_offsets[m + 1]
+        if end - start < 2:
+            continue
+        root = find(movie_stars[start])
+        for i in range(start + 1, end):
+            other = find(movie_stars[i])
+            if other != root:
+                # Attach to the smaller index so roots stay stable
+                if other < root:
+                    root, other = other, root
+                parent[other] = root
+
+    labels = array("i", [-1]) * num_people
+    component = array("i", [0]) * num_people
+    count = 0
+    for p in range(num_people):
+        root = find(p)
+        if labels[root] == -1:
+            labels[root] = count
+            count += 1
+        component[p] = labels[root]
+    return component
+
+
+def build_csr(rows, edge_rows, edge_cols):
+    """
+    Returns (offsets, indices) arrays of the `rows` x ? sparse matrix
+    with a one at every (edge_rows[i], edge_cols[i]), using a counting sort.
+    Duplicate edges are dropped.
+    """
+    offsets = array("i", [0]) * (rows + 1)
+    for r in edge_rows:
+        offsets[r + 1] += 1
+    for r in range(rows):
+        offsets[r + 1] += offsets[r]
+
+    cursor = array("i", offsets)
+    indices = array("i", [0]) * len(edge_rows)
+    for r, c in zip(edge_rows, edge_cols):
+        indices[cursor[r]] = c
+        cursor[r] += 1
+
+    if not _has_duplicates(offsets, indices):
+        return offsets, indices
+
+    compact = array("i")
+    new_offsets = array("i", [0]) * (rows + 1)
+    for r in range(rows):
+        row = sorted(set(indices[offsets[r]:offsets[r + 1]]))
+        compact.extend(row)
+        new_offsets[r + 1] = len(compact)
+    return new_offsets, compact
+
+
+def _has_duplicates(offsets, indices):
+    for r in range(len(offsets) - 1):
+        start, end = offsets[r], offsets[r + 1]
+        if end - start > 1 and len(set(indices[start:end])) != end - start:
+            return True
+    return False
+
+
+class PeopleView(Mapping):
+    """
+    Maps person_id to a dictionary of: name, birth, movies (a set of
+    movie_ids), built on access from the underlying graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        p = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[p],
+            "birth": graph.person_births[p],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(p)}
+        }
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Maps movie_id to a dictionary of: title, year, stars (a set of
+    person_ids), built on access from the underlying graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        m = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[m],
+            "year": graph.movie_years[m],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(m)}
+        }
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Maps lowercased names to a set of corresponding person_ids.
+    The underlying index is only built on first use, and extended with
+    people added to the graph since.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._names = {}
+        self._indexed = 0
+
+    @property
+    def names(self):
+        person_names = self.graph.person_names
+        if self._indexed < len(person_names):
+            names = self._names
+            for p in range(self._indexed, len(person_names)):
+                names.setdefault(person_names[p].lower(), []).append(p)
+            self._indexed = len(person_names)
+        return self._names
+
+    def __getitem__(self, name):
+        person_ids = self.graph.person_ids
+        return {person_ids[p] for p in self.names[name]}
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class ComponentsView(Mapping):
+    """
+    Maps person_id to the id of its connected component.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        return self.graph.component_of(self.graph.person_index[person_id])
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
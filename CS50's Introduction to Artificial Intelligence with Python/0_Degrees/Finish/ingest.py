@@ -0,0 +1,133 @@
+"""
+Parallel parsing of stars.csv.
+
+The file is split into byte ranges that start and end on line boundaries.
+Every worker process is handed the maps from person and movie ids to dense
+ints once, when it starts, and turns each range into two parallel int
+arrays of (person, movie) edges. The parent only concatenates the arrays,
+in file order.
+"""
+
+import csv
+import io
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Below this many bytes per worker, spawning processes costs more than it saves
+MIN_CHUNK_BYTES = 1 << 20
+
+# (person_index, movie_index) of this process, set by _init_worker
+_indexes = None
+
+
+def chunk_ranges(path, chunks):
+    """
+    Returns up to `chunks` (start, end) byte ranges covering every data
+    line of the CSV file at `path`, skipping its header line.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        step = max(1, (size - start) // max(1, chunks))
+        boundaries = [start]
+        while boundaries[-1] < size:
+            position = boundaries[-1] + step
+            if position >= size:
+                boundaries.append(size)
+                break
+            f.seek(position)
+            f.readline()
+            boundaries.append(min(f.tell(), size))
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def header_columns(path, fields):
+    """
+    Returns the positions of the named `fields` in the header line of the
+    CSV file at `path`, so every chunk reads them as DictReader would.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), [])
+    missing = [field for field in fields if field not in header]
+    if missing:
+        raise ValueError(f"{path} has no {', '.join(missing)} column")
+    return tuple(header.index(field) for field in fields)
+
+
+def _init_worker(person_index, movie_index):
+    global _indexes
+    _indexes = (person_index, movie_index)
+
+
+def parse_chunk(path, start, end, columns=(0, 1)):
+    """
+    Parses the rows between byte offsets `start` and `end` of `path`,
+    taking the person_id and movie_id from the `columns` positions and
+    looking them up in the maps given to the worker.
+
+    Returns (edge_people, edge_movies): two parallel int arrays of dense
+    person and movie ints. Rows naming an unknown person or movie are
+    skipped.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    person_index, movie_index = _indexes
+    person_column, movie_column = columns
+    width = max(columns) + 1
+    edge_people = array("i")
+    edge_movies = array("i")
+    for row in csv.reader(io.StringIO(data.decode("utf-8"))):
+        if len(row) < width:
+            continue
+        p = person_index.get(row[person_column])
+        m = movie_index.get(row[movie_column])
+        if p is not None and m is not None:
+            edge_people.append(p)
+            edge_movies.append(m)
+    return edge_people, edge_movies
+
+
+def read_stars(path, person_index, movie_index, workers=None):
+    """
+    Parses the stars CSV file at `path` using up to `workers` processes
+    (all cores if None), mapping ids to dense ints with the dicts
+    `person_index` and `movie_index`. Returns the same pair of arrays as
+    `parse_chunk` for the whole file.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    columns = header_columns(path, ("person_id", "movie_id"))
+    size = os.path.getsize(path)
+    workers = max(1, min(workers, size // MIN_CHUNK_BYTES))
+    ranges = chunk_ranges(path, workers)
+
+    if workers == 1:
+        _init_worker(person_index, movie_index)
+        try:
+            results = [parse_chunk(path, start, end, columns)
+                       for start, end in ranges]
+        finally:
+            # The maps belong to the caller once parsing is done
+            _init_worker(None, None)
+    else:
+        # Forked workers inherit the maps rather than unpickling them
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(person_index,
+                                           movie_index)) as pool:
+            results = list(pool.map(parse_chunk,
+                                    [path] * len(ranges),
+                                    [start for start, _ in ranges],
+                                    [end for _, end in ranges],
+                                    [columns] * len(ranges)))
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    for chunk_people, chunk_movies in results:
+        edge_people.extend(chunk_people)
+        edge_movies.extend(chunk_movies)
+    return edge_people, edge_movies
@@ -0,0 +1,315 @@
+"""
+Landmark (ALT) distance index over a `graph.Graph`.
+
+A handful of people spread around the edge of the graph are picked as
+landmarks and the BFS distance from each of them to every person is stored
+in one byte per person. By the triangle inequality, for any landmark L
+
+    |d(L, a) - d(L, b)| <= d(a, b) <= d(L, a) + d(L, b)
+
+which gives instant distance estimates without any search; that is what
+the index is for (see degrees.distance_estimate). The bounds also make an
+admissible heuristic for A*, but movie graphs are shallow: true distances
+of 3 to 5 get lower bounds of 1 or 2, too weak to prune much, and
+`LandmarkIndex.astar` loses to a plain BFS at the median, let alone to a
+bidirectional one. Use degrees' "bidirectional" strategy for fast paths.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+import snapshot
+
+MAGIC = b"DEGLMRK\0"
+VERSION = 2
+FILENAME = "degrees.landmarks"
+
+# Distances are stored in one byte; larger ones are capped, which keeps
+# the bounds valid since capping never increases a difference
+UNREACHABLE = 255
+MAX_DISTANCE = 254
+
+_PREAMBLE = struct.Struct("<8sII")
+
+# Landmarks consulted by the A* heuristic, those bounding the source best
+ACTIVE_LANDMARKS = 4
+
+# Maps UNREACHABLE to 0 and every other distance to itself, so people in
+# other components are never picked as the farthest
+_REACHED = bytes(range(UNREACHABLE)) + b"\0"
+
+
+class LandmarkIndex():
+
+    def __init__(self, landmarks, distances, num_people):
+        """
+        Initialize an index from the landmark person ints and a flat
+        landmark-major array of `len(landmarks) * num_people` distances.
+        """
+        self.landmarks = landmarks
+        self.distances = distances
+        self.num_people = num_people
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Picks `k` landmarks by farthest-point selection in the largest
+        component and runs a BFS from each of them. The first landmark is
+        the person farthest from some member of that component, and each
+        next one the person farthest from every landmark picked so far.
+
+        Hubs sit close to everyone and so bound nothing; people on the
+        edge of the graph give lower bounds near the true distances.
+        """
+        n = graph.num_people()
+        landmarks = []
+        distances = array("B")
+        if n == 0 or k <= 0:
+            return cls(landmarks, distances, n)
+
+        sizes = graph.component_sizes
+        largest = max(range(len(sizes)), key=sizes.__getitem__)
+        start = next(p for p in range(n) if graph.component_of(p) == largest)
+        closest = bytes(bfs_distances(graph, start)).translate(_REACHED)
+        is_landmark = bytearray(n)
+        while len(landmarks) < min(k, n):
+            farthest = max(closest)
+            if farthest:
+                p = closest.index(farthest)
+            else:
+                # Everyone in the component is a landmark already
+                p = is_landmark.index(0)
+            landmarks.append(p)
+            is_landmark[p] = 1
+            row = bfs_distances(graph, p)
+            distances.extend(row)
+            closest = bytes(map(min, closest,
+                                bytes(row).translate(_REACHED)))
+        return cls(landmarks, distances, n)
+
+    def row(self, i):
+        """Returns the distances from the `i`th landmark."""
+        start = i * self.num_people
+        return self.distances[start:start + self.num_people]
+
+    def estimate(self, a, b):
+        """
+        Returns (lower, upper) bounds on the distance between person ints
+        `a` and `b`, or None if some landmark proves them disconnected.
+        """
+        if a == b:
+            return (0, 0)
+        lower, upper = 0, None
+        n = self.num_people
+        distances = self.distances
+        for i in range(len(self.landmarks)):
+            da = distances[i * n + a]
+            db = distances[i * n + b]
+            if da == UNREACHABLE and db == UNREACHABLE:
+                continue
+            if da == UNREACHABLE or db == UNREACHABLE:
+                return None
+            lower = max(lower, abs(da - db))
+            if da < MAX_DISTANCE and db < MAX_DISTANCE:
+                if upper is None or da + db < upper:
+                    upper = da + db
+        return (max(lower, 1), upper)
+
+    def heuristic(self, target, source=None):
+        """
+        Returns h(p), a lower bound on the distance from person int `p`
+        to `target`. Given a `source`, only the ACTIVE_LANDMARKS
+        landmarks that bound the source best are consulted.
+        """
+        n = self.num_people
+        distances = self.distances
+        rows = []
+        for i in range(len(self.landmarks)):
+            dt = distances[i * n + target]
+            if dt != UNREACHABLE:
+                rows.append((i * n, dt))
+        if source is not None:
+            rows.sort(key=lambda row: -abs(distances[row[0] + source]
+                                           - row[1]))
+            del rows[ACTIVE_LANDMARKS:]
+
+        def h(p):
+            best = 0
+            for start, dt in rows:
+                dp = distances[start + p]
+                if dp != UNREACHABLE:
+                    d = dp - dt if dp > dt else dt - dp
+                    if d > best:
+                        best = d
+            return best
+        return h
+
+    def astar(self, graph, source, target):
+        """
+        A* search between person ints `source` and `target`, guided by
+        the landmark lower bounds. Returns the list of (movie, person)
+        int pairs leading to the target, or None if they are not connected.
+
+        The bounds are consistent and small, so open people are kept in
+        buckets by f = g + h, which never decreases, rather than in a heap.
+        """
+        if source == target:
+            return []
+        if self.estimate(source, target) is None:
+            return None
+
+        h = self.heuristic(target, source)
+        n = graph.num_people()
+        cost = array("i", [-1]) * n
+        parent_person = array("i", [-1]) * n
+        parent_movie = array("i", [-1]) * n
+        closed = bytearray(n)
+        # The cost each movie's cast was last reached at, so a cast is
+        # only scanned again when it can be reached more cheaply
+        movie_cost = array("i", [-1]) * graph.num_movies()
+
+        cost[source] = 0
+        f = h(source)
+        buckets = [[] for _ in range(f)] + [[source]]
+        while f < len(buckets):
+            bucket = buckets[f]
+            while bucket:
+                # Deepest first among equals, which reaches the target
+                # sooner
+                p = bucket.pop()
+                if closed[p]:
+                    continue
+                if p == target:
+                    return _unwind(source, p, parent_person, parent_movie)
+                closed[p] = 1
+                g = cost[p] + 1
+                for m in graph.movies_of(p):
+                    if movie_cost[m] != -1 and movie_cost[m] <= g:
+                        continue
+                    movie_cost[m] = g
+                    for q in graph.stars_of(m):
+                        if closed[q] or (cost[q] != -1 and cost[q] <= g):
+                            continue
+                        cost[q] = g
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        # Nothing left open can reach the target in
+                        # fewer than f moves
+                        if q == target and g == f:
+                            return _unwind(source, q, parent_person,
+                                           parent_movie)
+                        fq = g + h(q)
+                        while len(buckets) <= fq:
+                            buckets.append([])
+                        buckets[fq].append(q)
+            f += 1
+        return None
+
+    def save(self, path, sources=None):
+        """
+        Write the index to `path`, recording the stats of the
+        CSV files it was built from, if given.
+        """
+        header = json.dumps({
+            "landmarks": list(self.landmarks),
+            "num_people": self.num_people,
+            "sources": sources
+        }).encode("utf-8")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.write(bytes(self.distances))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, sources=None):
+        """
+        Map an index saved at `path` back in. Returns None if it is
+        missing, from another version, or was built from CSV files whose
+        stats differ from `sources`.
+        """
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        with f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) != _PREAMBLE.size:
+                return None
+            magic, version, header_len = _PREAMBLE.unpack(preamble)
+            if magic != MAGIC or version != VERSION:
+                return None
+            header = json.loads(f.read(header_len).decode("utf-8"))
+            if sources is not None and header["sources"] != sources:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = _PREAMBLE.size + header_len
+        return cls(header["landmarks"], memoryview(buffer)[start:],
+                   header["num_people"])
+
+
+def _unwind(source, p, parent_person, parent_movie):
+    """Follows parent arrays from `p` back to `source`."""
+    path = []
+    while p != source:
+        path.append((parent_movie[p], p))
+        p = parent_person[p]
+    path.reverse()
+    return path
+
+
+def bfs_distances(graph, source):
+    """
+    Returns a byte array of the BFS distance from person int `source`
+    to every person, UNREACHABLE for people in other components.
+    """
+    n = graph.num_people()
+    distances = array("B", [UNREACHABLE]) * n
+    seen_movies = bytearray(graph.num_movies())
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, MAX_DISTANCE)
+        next_frontier = []
+        for p in frontier:
+            for m in graph.movies_of(p):
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for q in graph.stars_of(m):
+                    if distances[q] == UNREACHABLE:
+                        distances[q] = depth
+                        next_frontier.append(q)
+        frontier = next_frontier
+    return distances
+
+
+def path_for(directory):
+    """Returns where the landmark index of `directory` lives."""
+    return os.path.join(directory, FILENAME)
+
+
+def load_or_build(graph, directory, k=16):
+    """
+    Returns the landmark index of the data in `directory`, loaded from
+    disk when it is current, otherwise built from `graph` and saved.
+    """
+    sources = snapshot.source_stats(directory)
+    # Updates applied from the journal change distances too
+    sources[snapshot.JOURNAL] = snapshot.journal_stats(directory)
+    index = LandmarkIndex.load(path_for(directory), sources)
+    n = graph.num_people()
+    if (index is not None and index.num_people == n
+            and len(index.landmarks) == min(k, n)):
+        return index
+    index = LandmarkIndex.build(graph, k)
+    try:
+        index.save(path_for(directory), sources)
+    except OSError:
+        pass
+    return index
@@ -0,0 +1,174 @@
+"""
+Fuzzy and partial lookup of people by name.
+
+Every lowercased name is split into character trigrams (padded with spaces,
+so word starts and ends count too) and a sorted list of names supports
+prefix search by bisection. Candidates are ranked by how they match:
+exact, then prefix, then trigram similarity.
+"""
+
+import math
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+# Rank of each kind of match, best first
+EXACT, PREFIX, WORD_PREFIX, FUZZY = range(4)
+
+
+class NameIndex():
+
+    def __init__(self, names):
+        """
+        Build an index from a mapping of lowercased names to
+        collections of ids, like the `names` dict of degrees.py.
+        """
+        self.ids = {name: list(ids) for name, ids in names.items()}
+        # Names by position; names added later go at the end
+        self.names = sorted(self.ids)
+        # Posting lists of name positions, and the number of distinct
+        # trigrams of every name
+        self.trigrams = defaultdict(list)
+        self.gram_counts = array("i")
+        for i, name in enumerate(self.names):
+            grams = set(trigrams(name))
+            for gram in grams:
+                self.trigrams[gram].append(i)
+            self.gram_counts.append(len(grams))
+
+        # (name, position) pairs in name order, for prefix search
+        self.sorted_names = [(name, i) for i, name in enumerate(self.names)]
+
+        # Word starts inside a name, so "hanks" finds "tom hanks"
+        self.words = sorted(
+            (word, i)
+            for i, name in enumerate(self.names)
+            for word in name.split()[1:]
+        )
+
+    def add(self, name, person_id):
+        """
+        Makes `person_id` findable under the lowercased `name`, in time
+        proportional to the name rather than to the index.
+        """
+        if name in self.ids:
+            self.ids[name].append(person_id)
+            return
+        i = len(self.names)
+        self.ids[name] = [person_id]
+        self.names.append(name)
+        grams = set(trigrams(name))
+        for gram in grams:
+            self.trigrams[gram].append(i)
+        self.gram_counts.append(len(grams))
+        insort(self.sorted_names, (name, i))
+        for word in name.split()[1:]:
+            insort(self.words, (word, i))
+
+    def search(self, query, limit=10, min_similarity=0.3):
+        """
+        Returns up to `limit` (id, name, rank, score) candidates for
+        `query`, best first. `rank` is one of EXACT, PREFIX, WORD_PREFIX or
+        FUZZY and `score` the trigram similarity between the names.
+        """
+        query = " ".join(query.lower().split())
+        if not query:
+            return []
+
+        # An exact match ranks first, so once it fills `limit` nothing
+        # else can make the cut
+        exact = self.ids.get(query, ())
+        if len(exact) >= limit:
+            return [(person_id, query, EXACT, 1.0)
+                    for person_id in exact[:limit]]
+
+        # Maps a name position to its best rank
+        ranks = {}
+        found = 0
+        start = bisect_left(self.sorted_names, (query,))
+        for j in range(start, len(self.sorted_names)):
+            name, i = self.sorted_names[j]
+            if not name.startswith(query):
+                break
+            ranks[i] = EXACT if name == query else PREFIX
+            found += len(self.ids[name])
+            if len(ranks) >= limit:
+                break
+
+        query_grams = set(trigrams(query))
+        size = len(query_grams)
+        rarest = sorted(query_grams,
+                        key=lambda gram: len(self.trigrams.get(gram, ())))
+        hits = Counter()
+        scores = {}
+
+        # Word prefix and fuzzy matches rank lower, so they are only
+        # needed when exact and prefix matches leave room
+        if found < limit:
+            start = bisect_left(self.words, (query,))
+            for j in range(start, len(self.words)):
+                word, i = self.words[j]
+                if not word.startswith(query):
+                    break
+                ranks.setdefault(i, WORD_PREFIX)
+                if len(ranks) >= 4 * limit:
+                    break
+
+            # A name with similarity >= min_similarity shares at least
+            # `needed` of the query's trigrams, so it must contain two of
+            # any size - needed + 2 of them (one if that is all of them).
+            # Hits on that many of the rarest are counted, names with too
+            # few are dropped in one pass, and the other trigrams are only
+            # looked up for the names left
+            needed = max(1, math.ceil(min_similarity * size))
+            split = min(size, size - needed + 2)
+            for gram in rarest[:split]:
+                hits.update(self.trigrams.get(gram, ()))
+            rarest = rarest[split:]
+            least = needed - len(rarest)
+            for i in [i for i, shared in hits.items() if shared >= least]:
+                score = self.similarity(i, hits[i], rarest, size,
+                                        min_similarity)
+                if score >= min_similarity:
+                    scores[i] = score
+                    ranks.setdefault(i, FUZZY)
+
+        for i in ranks:
+            if i not in scores:
+                scores[i] = self.similarity(i, hits.get(i, 0), rarest, size)
+
+        best = sorted(ranks, key=lambda i: (ranks[i], -scores[i],
+                                            self.names[i]))
+        results = []
+        for i in best:
+            name = self.names[i]
+            for person_id in self.ids[name]:
+                results.append((person_id, name, ranks[i], scores[i]))
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def similarity(self, i, shared, grams, size, min_similarity=0.0):
+        """
+        Returns the trigram similarity between a query with `size`
+        trigrams and the name at position `i`, which shares `shared` of
+        them besides any of `grams`. Returns 0 as soon as it cannot reach
+        `min_similarity`.
+        """
+        count = self.gram_counts[i]
+        left = len(grams)
+        for gram in grams:
+            most = min(shared + left, count)
+            if most / (size + count - most) < min_similarity:
+                return 0
+            left -= 1
+            postings = self.trigrams.get(gram, ())
+            j = bisect_left(postings, i)
+            if j < len(postings) and postings[j] == i:
+                shared += 1
+        return shared / (size + count - shared)
+
+def trigrams(name):
+    """Returns the character trigrams of a space-padded name."""
+    padded = f"  {name} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
@@ -0,0 +1,420 @@
+"""
+Answers many degrees-of-separation queries against one loaded graph.
+
+Requests and responses are JSON objects, one per line:
+
+    {"source": "Kevin Bacon", "target": "Tom Hanks"}
+    {"source_id": "102", "target_id": "158", "strategy": "bidirectional"}
+    {"source": "bacon", "target": "Tom Hanks", "target_birth": 1956}
+    {"source": "Kevin Bacon", "target_ids": ["158", "129"]}
+    {"command": "stats"}
+    {"command": "components"}
+    {"command": "apply", "directory": "updates"}
+
+Names may be partial or misspelled and ambiguous names are resolved
+without prompting (see degrees.resolve_person); the response reports which
+people were picked. An optional "id" field is echoed back. Queries are
+read from stdin, or from clients of a local Unix socket with --socket
+PATH. Recent results are kept in an LRU cache and per-query latency stats
+are reported on request and on exit.
+
+The "apply" command adds the rows of the CSV files in a directory to the
+loaded data (see degrees.apply_delta) and drops the cached results of the
+components it touched.
+"""
+
+import json
+import os
+import socketserver
+import sys
+import time
+from collections import OrderedDict
+
+import degrees
+
+
+class LRUCache():
+
+    def __init__(self, capacity=4096):
+        """
+        Initialize an empty cache holding at most `capacity` entries.
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for `key`, marking it as recently used,
+        or `default` if it is not cached.
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Cache `value` under `key`, evicting the least recently used
+        entry if the cache is full.
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class LatencyStats():
+
+    def __init__(self):
+        """
+        Initialize an empty record of query latencies, in seconds.
+        """
+        self.samples = []
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def summary(self):
+        """
+        Returns count, mean and percentile latencies in milliseconds.
+        """
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+
+        def percentile(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+        return {
+            "count": len(ordered),
+            "mean_ms": 1000 * sum(ordered) / len(ordered),
+            "p50_ms": 1000 * percentile(0.50),
+            "p90_ms": 1000 * percentile(0.90),
+            "p99_ms": 1000 * percentile(0.99),
+            "max_ms": 1000 * ordered[-1]
+        }
+
+
+class QueryServer():
+
+    def __init__(self, cache_size=4096, strategy="bidirectional"):
+        """
+        Initialize a server over the data already loaded into `degrees`.
+        """
+        self.cache = LRUCache(cache_size)
+        self.latency = LatencyStats()
+        self.strategy = strategy
+
+    def handle_line(self, line):
+        """
+        Returns the JSON response line for one JSON request line.
+        """
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return json.dumps({"error": f"bad request: {e}"})
+
+        if request.get("command") == "stats":
+            response = self.stats()
+        elif request.get("command") == "components":
+            response = self.components()
+        elif request.get("command") == "apply":
+            response = self.apply(request)
+        elif "target_ids" in request:
+            response = self.distances(request)
+        else:
+            response = self.query(request)
+        if "id" in request:
+            response["id"] = request["id"]
+        return json.dumps(response)
+
+    def query(self, request):
+        """
+        Answers one {"source", "target"} request.
+        """
+        start = time.perf_counter()
+        try:
+            source = self.resolve(request, "source")
+            target = self.resolve(request, "target")
+        except LookupError as e:
+            return {"error": str(e)}
+        strategy = request.get("strategy", self.strategy)
+        if strategy not in degrees.STRATEGIES:
+            return {"error": f"unknown strategy {strategy!r}"}
+
+        try:
+            path, cached = self.shortest_path(source, target, strategy)
+        except ValueError as e:
+            return {"error": str(e)}
+        elapsed = time.perf_counter() - start
+        self.latency.add(elapsed)
+
+        response = {
+            "source": source,
+            "source_name": degrees.people[source]["name"],
+            "target": target,
+            "target_name": degrees.people[target]["name"],
+            "degrees": None if path is None else len(path),
+            "path": None if path is None else [
+                {"movie_id": movie_id, "person_id": person_id}
+                for movie_id, person_id in path
+            ],
+            "cached": cached,
+            "elapsed_ms": 1000 * elapsed
+        }
+        return response
+
+    def distances(self, request):
+        """
+        Answers one {"source", "target_ids"} request with the degrees of
+        separation to every target, from a single search.
+        """
+        start = time.perf_counter()
+        try:
+            source = self.resolve(request, "source")
+        except LookupError as e:
+            return {"error": str(e)}
+        target_ids = request["target_ids"]
+        if not isinstance(target_ids, list):
+            return {"error": "target_ids must be a list"}
+        target_ids = [str(target_id) for target_id in target_ids]
+        unknown = [t for t in target_ids if t not in degrees.people]
+        if unknown:
+            return {"error": f"unknown target_ids {unknown}"}
+
+        result = degrees.distances_from(source, target_ids)
+        elapsed = time.perf_counter() - start
+        self.latency.add(elapsed)
+        return {
+            "source": source,
+            "degrees": result,
+            "elapsed_ms": 1000 * elapsed
+        }
+
+    def resolve(self, request, field):
+        """
+        Returns the person_id named by `field` or `field`_id in `request`,
+        raising LookupError if there is no single match.
+        """
+        person_id = request.get(f"{field}_id")
+        if person_id is not None:
+            person_id = str(person_id)
+            if person_id not in degrees.people:
+                raise LookupError(f"{field}: unknown person_id {person_id}")
+            return person_id
+
+        name = request.get(field)
+        if not isinstance(name, str):
+            raise LookupError(f"missing {field}")
+        birth = request.get(f"{field}_birth")
+        person_id = degrees.resolve_person(name, birth)
+        if person_id is None:
+            raise LookupError(f"{field}: person {name!r} not found")
+        return person_id
+
+    def shortest_path(self, source, target, strategy):
+        """
+        Returns (path, cached) for a pair, serving it from the cache when
+        possible. Since the graph is undirected, a pair and its reverse
+        share one cache entry. Each strategy has its own entries, so one
+        that cannot run (like "astar" without landmarks) still fails.
+        """
+        if source <= target:
+            key = (source, target, strategy)
+        else:
+            key = (target, source, strategy)
+
+        missing = object()
+        path = self.cache.get(key, missing)
+        cached = path is not missing
+        if not cached:
+            path = degrees.shortest_path(key[0], key[1], strategy=strategy)
+            self.cache.put(key, path)
+        if path is not None and key[0] != source:
+            path = reverse_path(key[0], path)
+        return path, cached
+
+    def apply(self, request):
+        """
+        Answers one {"command": "apply", "directory"} request, adding the
+        rows in that directory and invalidating the affected cache entries.
+        """
+        directory = request.get("directory")
+        if not isinstance(directory, str):
+            return {"error": "missing directory"}
+        start = time.perf_counter()
+        try:
+            touched = degrees.apply_delta(directory)
+        except (OSError, KeyError, ValueError) as e:
+            return {"error": f"cannot apply {directory}: {e}"}
+        invalidated = self.invalidate(touched)
+        return {
+            "people": len(degrees.people),
+            "movies": len(degrees.movies),
+            "components_touched": len(touched),
+            "invalidated": invalidated,
+            "elapsed_ms": 1000 * (time.perf_counter() - start)
+        }
+
+    def invalidate(self, components):
+        """
+        Drops cached paths with an endpoint in one of the component ids
+        in `components`, returning how many were dropped. Paths within
+        other components cannot have changed.
+        """
+        stale = [key for key in self.cache.entries
+                 if degrees.component_of(key[0]) in components
+                 or degrees.component_of(key[1]) in components]
+        for key in stale:
+            del self.cache.entries[key]
+        return len(stale)
+
+    def stats(self):
+        return {
+            "latency": self.latency.summary(),
+            "cache": {
+                "size": len(self.cache),
+                "capacity": self.cache.capacity,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses
+            }
+        }
+
+    def components(self, top=10):
+        """
+        Summarizes the connected components of the loaded graph.
+        """
+        # Components merged by updates are left with size 0
+        sizes = sorted((size for size in degrees.component_sizes if size),
+                       reverse=True)
+        return {
+            "count": len(sizes),
+            "people": sum(sizes),
+            "largest": sizes[:top],
+            "singletons": sum(1 for size in sizes if size == 1)
+        }
+
+    def serve_lines(self, lines, out):
+        """
+        Answers every request in the iterable `lines`, writing each
+        response line to the file `out`.
+        """
+        for line in lines:
+            if not line.strip():
+                continue
+            out.write(self.handle_line(line) + "\n")
+            out.flush()
+
+    def serve_socket(self, path):
+        """
+        Answers clients of a Unix socket at `path`, one connection at a time,
+        until interrupted.
+        """
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                lines = (line.decode("utf-8") for line in self.rfile)
+                out = _SocketWriter(self.wfile)
+                server.serve_lines(lines, out)
+
+        if os.path.exists(path):
+            os.unlink(path)
+        with socketserver.UnixStreamServer(path, Handler) as unix_server:
+            try:
+                unix_server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.unlink(path)
+
+
+class _SocketWriter():
+    """Text-file facade over a socket's binary write file."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, s):
+        self.wfile.write(s.encode("utf-8"))
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the last person of `path` back to `source`,
+    given a path of (movie_id, person_id) pairs starting at `source`.
+    """
+    persons = [source] + [person_id for _, person_id in path]
+    reversed_path = []
+    for i in range(len(path) - 1, -1, -1):
+        reversed_path.append((path[i][0], persons[i]))
+    return reversed_path
+
+
+def main():
+    args = sys.argv[1:]
+    usage = ("Usage: python server.py [--compact] [--landmarks] "
+             "[--socket PATH] [--cache-size N] [directory]")
+    compact = False
+    use_landmarks = False
+    socket_path = None
+    cache_size = 4096
+    positional = []
+    while args:
+        arg = args.pop(0)
+        if arg == "--compact":
+            compact = True
+        elif arg == "--landmarks":
+            compact = use_landmarks = True
+        elif arg == "--socket" and args:
+            socket_path = args.pop(0)
+        elif arg == "--cache-size" and args:
+            try:
+                cache_size = int(args.pop(0))
+            except ValueError:
+                sys.exit(usage)
+        elif arg.startswith("--") or len(positional) == 1:
+            sys.exit(usage)
+        else:
+            positional.append(arg)
+    directory = positional[0] if positional else "large"
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory, compact=compact)
+    if use_landmarks:
+        degrees.use_landmarks(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    server = QueryServer(cache_size=cache_size)
+    try:
+        if socket_path is None:
+            server.serve_lines(sys.stdin, sys.stdout)
+        else:
+            print(f"Listening on {socket_path}", file=sys.stderr)
+            server.serve_socket(socket_path)
+    finally:
+        print(json.dumps(server.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Binary snapshots of a `graph.Graph`, so the CSV files only have to be
+parsed once.
+
+A snapshot file is laid out as
+
+    magic (8 bytes) | version (u32) | header length (u32) | JSON header
+    | padding | sections...
+
+The JSON header records the size and mtime of every source CSV file and the
+byte offset, length and array typecode of each section. Sections are the
+four CSR arrays, the component labels and sizes, the numeric movie years
+and, for every string column, an offsets array and a UTF-8 blob. Loading
+maps the file and casts sections in place, so nothing is parsed or copied
+up front.
+
+Rows added later with `append_journal` go to a JSON-lines journal next to
+the snapshot and are applied on top of it (see `Graph.apply`) every time
+it is loaded, so updates never rewrite the snapshot itself.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+from graph import Graph
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 3
+FILENAME = "degrees.snapshot"
+JOURNAL = "degrees.delta"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "component", "component_sizes", "movie_year_values")
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years")
+
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 8
+
+
+def path_for(directory):
+    """Returns where the snapshot of `directory` lives."""
+    return os.path.join(directory, FILENAME)
+
+
+def journal_path(directory):
+    """Returns where the update journal of `directory` lives."""
+    return os.path.join(directory, JOURNAL)
+
+
+def source_stats(directory):
+    """Returns the [size, mtime_ns] of every source CSV file."""
+    stats = {}
+    for name in SOURCES:
+        st = os.stat(os.path.join(directory, name))
+        stats[name] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def save(graph, directory):
+    """
+    Write a snapshot of `graph`, loaded from the CSV files in `directory`,
+    next to those files. The file is written under a temporary name and
+    renamed into place, so readers never see a partial snapshot.
+    """
+    if graph.extra_person_movies or len(graph.person_ids) != \
+            len(graph.person_offsets) - 1:
+        raise ValueError("graphs with applied updates are saved as a "
+                         "journal, see append_journal")
+    sections = []
+    for name in ARRAYS:
+        sections.append((name, array("i", getattr(graph, name))))
+    for name in STRINGS:
+        offsets, blob = _encode_strings(getattr(graph, name))
+        sections.append((name + ".offsets", offsets))
+        sections.append((name + ".data", blob))
+
+    header = {
+        "byteorder": sys.byteorder,
+        "sources": source_stats(directory),
+        "sections": {}
+    }
+
+    # Lay the sections out first, then size the header to fit in front
+    layout = []
+    position = 0
+    for name, data in sections:
+        nbytes = len(data) * data.itemsize if isinstance(data, array) \
+            else len(data)
+        typecode = data.typecode if isinstance(data, array) else "B"
+        layout.append((name, position, nbytes, typecode))
+        position = _aligned(position + nbytes)
+
+    # The header encodes its own offsets, so iterate until its length
+    # stops changing
+    base = 0
+    while True:
+        header["sections"] = {
+            name: [base + offset, nbytes, typecode]
+            for name, offset, nbytes, typecode in layout
+        }
+        encoded = json.dumps(header).encode("utf-8")
+        new_base = _aligned(_PREAMBLE.size + len(encoded))
+        if new_base == base:
+            break
+        base = new_base
+
+    path = path_for(directory)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+        f.write(encoded)
+        for (name, data), (_, offset, nbytes, _) in zip(sections, layout):
+            f.write(b"\0" * (base + offset - f.tell()))
+            f.write(data.tobytes() if isinstance(data, array) else data)
+    os.replace(tmp, path)
+
+
+def load(directory):
+    """
+    Returns the graph stored in the snapshot of `directory`, or None if
+    there is no snapshot or it is stale, from another version or from a
+    machine with a different byte order.
+    """
+    path = path_for(directory)
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            return None
+        magic, version, header_len = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC or version != VERSION:
+            return None
+        try:
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        except ValueError:
+            return None
+        if header.get("byteorder") != sys.byteorder:
+            return None
+        try:
+            if header.get("sources") != source_stats(directory):
+                return None
+        except OSError:
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(buffer)
+    sections = {
+        name: view[offset:offset + nbytes].cast(typecode)
+        for name, (offset, nbytes, typecode) in header["sections"].items()
+    }
+    columns = {name: sections[name] for name in ARRAYS}
+    for name in STRINGS:
+        columns[name] = StringTable(sections[name + ".offsets"],
+                                    sections[name + ".data"])
+    graph = Graph(**columns)
+    graph.apply(*read_journal(directory))
+    return graph
+
+
+def load_or_build(directory, workers=None):
+    """
+    Returns the graph for `directory`, from its snapshot when that is
+    current, otherwise parsed from CSV (see `Graph.from_csv` for
+    `workers`) and snapshotted for next time.
+    """
+    graph = load(directory)
+    if graph is not None:
+        return graph
+    graph = Graph.from_csv(directory, workers)
+    try:
+        save(graph, directory)
+    except OSError:
+        # Read-only data directories still load, just without the cache
+        pass
+    graph.apply(*read_journal(directory))
+    return graph
+
+
+def append_journal(directory, new_people=(), new_movies=(), new_stars=()):
+    """
+    Record rows added to the data in `directory`, in the form taken by
+    `Graph.apply`, so they are applied whenever its snapshot is loaded.
+    """
+    with open(journal_path(directory), "a", encoding="utf-8") as f:
+        for row in new_people:
+            f.write(json.dumps(["person", *row]) + "\n")
+        for row in new_movies:
+            f.write(json.dumps(["movie", *row]) + "\n")
+        for row in new_stars:
+            f.write(json.dumps(["star", *row]) + "\n")
+
+
+def read_journal(directory):
+    """
+    Returns the (new_people, new_movies, new_stars) rows recorded in the
+    journal of `directory`; a partly written last line is ignored.
+    """
+    rows = {"person": [], "movie": [], "star": []}
+    try:
+        f = open(journal_path(directory), encoding="utf-8")
+    except OSError:
+        return [], [], []
+    with f:
+        for line in f:
+            try:
+                kind, *row = json.loads(line)
+            except ValueError:
+                continue
+            if kind in rows:
+                rows[kind].append(tuple(row))
+    return rows["person"], rows["movie"], rows["star"]
+
+
+def journal_stats(directory):
+    """Returns the [size, mtime_ns] of the journal, or None if missing."""
+    try:
+        st = os.stat(journal_path(directory))
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class StringTable(Sequence):
+    """
+    Read-only sequence of strings stored as one UTF-8 blob plus an
+    offsets array; items are decoded on access.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]) \
+            .decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+def _encode_strings(strings):
+    """Returns (offsets, blob) for a sequence of strings."""
+    offsets = array("q", [0])
+    chunks = []
+    total = 0
+    for s in strings:
+        encoded = s.encode("utf-8")
+        chunks.append(encoded)
+        total += len(encoded)
+        offsets.append(total)
+    return offsets, b"".join(chunks)
+
+
+def _aligned(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
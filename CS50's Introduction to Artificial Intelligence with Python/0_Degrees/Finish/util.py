@@ -1,4 +1,11 @@
+import heapq
+import itertools
+from collections import deque
+
+
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -36,3 +43,129 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Same interface as StackFrontier, but backed by a deque and a
+    count of the nodes held per state, so every operation is O(1).
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier.pop()
+        self._forget(node.state)
+        return node
+
+    def _forget(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier.popleft()
+        self._forget(node.state)
+        return node
+
+
+class PriorityFrontier(DequeStackFrontier):
+    """
+    Frontier that always removes the node with the lowest priority,
+    backed by a binary heap. Ties are broken in insertion order.
+
+    The priority is given to `add`, or computed by calling the
+    `priority` function passed to the constructor on the node.
+    """
+
+    def __init__(self, priority=None):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.counter = itertools.count()
+
+    def add(self, node, priority=None):
+        if priority is None:
+            priority = self.priority(node)
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        _, _, node = heapq.heappop(self.frontier)
+        self._forget(node.state)
+        return node
+
+
+class DisjointSet():
+    """
+    Union-find over arbitrary hashable items, with path halving
+    and union by size.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """
+        Merges the sets holding `a` and `b`, returning the new root.
+        """
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+        return a
+
+    def labels(self):
+        """
+        Returns (labels, sizes): a dict mapping every item to a dense
+        component id, and a list of the size of each component.
+        """
+        roots = {}
+        labels = {}
+        sizes = []
+        for item in self.parent:
+            root = self.find(item)
+            if root not in roots:
+                roots[root] = len(sizes)
+                sizes.append(self.size[root])
+            labels[item] = roots[root]
+        return labels, sizes
@@ -0,0 +1,218 @@
+"""
+Tic Tac Toe Player on bitboards.
+
+A state is a pair of 9-bit ints (x, o), with bit 3 * i + j set when that
+player holds cell (i, j). Making a move or testing for a win is then a few
+integer operations instead of copying and scanning lists of lists. The
+functions mirror those of tictactoe.py; from_board and to_board convert to
+and from the list boards runner.py draws.
+"""
+
+import math
+
+from tictactoe import X, O, EMPTY, CELL_ORDER, SYMMETRIES
+
+FULL = (1 << 9) - 1
+
+# Rows, columns and diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# WINS[mask] is 1 if the cells in `mask` include a full line
+WINS = bytes(any(mask & win == win for win in WIN_MASKS)
+             for mask in range(FULL + 1))
+
+# COUNTS[mask] is the number of cells in `mask`
+COUNTS = bytes(bin(mask).count("1") for mask in range(FULL + 1))
+
+# Bits in search order: center, corners, then edges
+ORDER_BITS = tuple(1 << (3 * i + j) for i, j in CELL_ORDER)
+
+# PERMUTATIONS[k][mask] is `mask` moved by the k-th rotation or reflection
+PERMUTATIONS = []
+for cells in SYMMETRIES:
+    table = []
+    for mask in range(FULL + 1):
+        moved = 0
+        for n, (i, j) in enumerate(cells):
+            if mask >> (3 * i + j) & 1:
+                moved |= 1 << n
+        table.append(moved)
+    PERMUTATIONS.append(table)
+
+# Transposition table: maps a canonical position to (value, bound), the
+# value being for the player to move
+EXACT, LOWER, UPPER = range(3)
+transpositions = {}
+
+# Number of positions searched so far, over every search
+search_stats = {"nodes": 0}
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = state
+    return X if COUNTS[x] == COUNTS[o] else O
+
+
+def actions(state):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    taken = state[0] | state[1]
+    return {divmod(n, 3) for n in range(9) if not taken >> n & 1}
+
+
+def result(state, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = state
+    bit = 1 << (3 * action[0] + action[1])
+    if (x | o) & bit:
+        raise Exception("not a valid action")
+    if COUNTS[x] == COUNTS[o]:
+        return (x | bit, o)
+    return (x, o | bit)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[state[0]]:
+        return X
+    if WINS[state[1]]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return bool(WINS[x] or WINS[o]) or x | o == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[state[0]]:
+        return 1
+    if WINS[state[1]]:
+        return -1
+    return 0
+
+
+def minimax(state):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(state):
+        return None
+
+    x, o = state
+    own, other = (x, o) if COUNTS[x] == COUNTS[o] else (o, x)
+    taken = x | o
+    best, best_bit = -math.inf, None
+    for bit in ORDER_BITS:
+        if taken & bit:
+            continue
+        v = -negamax(other, own | bit, -math.inf, -best)
+        if v > best:
+            best, best_bit = v, bit
+            if best == 1:
+                break
+    return divmod(best_bit.bit_length() - 1, 3)
+
+
+def negamax(own, other, alpha, beta):
+    """
+    Returns the value of a position for the player to move, who holds
+    the cells in `own`, exact if it lies between `alpha` and `beta`,
+    otherwise a bound beyond them.
+    """
+    search_stats["nodes"] += 1
+    # Only the player who just moved can have completed a line
+    if WINS[other]:
+        return -1
+    taken = own | other
+    if taken == FULL:
+        return 0
+
+    key = canonical(own, other)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, bound = entry
+        if (bound == EXACT or (bound == LOWER and value >= beta)
+                or (bound == UPPER and value <= alpha)):
+            return value
+
+    lowest = alpha
+    v = -math.inf
+    for bit in ORDER_BITS:
+        if taken & bit:
+            continue
+        v = max(v, -negamax(other, own | bit, -beta, -alpha))
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+
+    if v <= lowest:
+        transpositions[key] = (v, UPPER)
+    elif v >= beta:
+        transpositions[key] = (v, LOWER)
+    else:
+        transpositions[key] = (v, EXACT)
+    return v
+
+
+def canonical(own, other):
+    """
+    Returns the smallest encoding of a position over its 8 rotations
+    and reflections.
+    """
+    return min(table[own] << 9 | table[other] for table in PERMUTATIONS)
+
+
+def from_board(board):
+    """
+    Returns the (x, o) state of a list board from tictactoe.py.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Returns the list board from tictactoe.py for an (x, o) state.
+    """
+    x, o = state
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            row.append(X if x & bit else O if o & bit else EMPTY)
+        board.append(row)
+    return board
@@ -0,0 +1,236 @@
+"""
+Monte Carlo Tree Search Player for tic-tac-toe and larger m,n,k games.
+
+Each iteration walks down the search tree picking children by UCT (upper
+confidence bound applied to trees), adds one new child, finishes the game
+from there with random moves, and credits the result to every node on the
+way back up. The move played is the root child visited most often.
+
+Boards are the (x, o) bitboards of mnk.py, so a random playout is a shuffle
+of the empty cells played in order. With several workers, each process
+grows its own tree from the same root with its own random seed and the root
+visit counts are added up (root parallelization).
+"""
+
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mnk
+from tictactoe import X
+
+# Exploration constant of UCT
+EXPLORATION = math.sqrt(2)
+
+# Number of playouts run so far in this process, over every search
+search_stats = {"nodes": 0}
+
+# Games by (m, n, k), shared by every search on the same board
+_games = {}
+
+# Process pool kept between moves, so workers start once rather than on
+# every move, and its number of workers
+_pool = None
+_pool_workers = 0
+
+
+class TreeNode():
+
+    __slots__ = ("own", "other", "move", "parent", "children", "untried",
+                 "done", "visits", "wins")
+
+    def __init__(self, own, other, move, parent, done):
+        """
+        Initialize a node for the position where the player to move holds
+        `own`, reached by the opponent playing `move`. `wins` counts the
+        playouts that opponent won, draws counting as half. `done` is that
+        opponent's result if the game is over (1 for a win, 0.5 for a
+        draw), otherwise None.
+        """
+        self.own = own
+        self.other = other
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = []
+        self.done = done
+        self.visits = 0
+        self.wins = 0
+
+
+def game_for(m, n, k):
+    """Returns the mnk.Game for an `m` by `n` board won by `k` in a row."""
+    if (m, n, k) not in _games:
+        _games[(m, n, k)] = mnk.Game(m, n, k)
+    return _games[(m, n, k)]
+
+
+def minimax(board, k=None, iterations=None, budget=1.0, workers=1,
+            seed=None):
+    """
+    Returns the action MCTS picks for the current player on a list board
+    like those of tictactoe.py, of any size, won by `k` in a row (the
+    shorter side, up to 5, if None). See `search` for the budget and
+    `seed`.
+    """
+    m, n = len(board), len(board[0])
+    if k is None:
+        k = min(m, n, 5)
+    game = game_for(m, n, k)
+    return best_action(game, game.from_board(board), iterations, budget,
+                       workers, seed)
+
+
+def best_action(game, state, iterations=None, budget=1.0, workers=1,
+                seed=None):
+    """
+    Returns the most visited root action after searching `state` of `game`
+    in `workers` processes (all cores if None), each with the given budget.
+    Each worker's random moves are seeded from a generator seeded by
+    `seed`.
+    """
+    if game.terminal(state):
+        return None
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        visits = search(game, state, iterations, budget, seed)
+    else:
+        rng = random.Random(seed)
+        visits = {}
+        args = [(game.m, game.n, game.k, state, iterations, budget,
+                 rng.getrandbits(64))
+                for _ in range(workers)]
+        for worker_visits in pool(workers).map(_search, args):
+            for move, count in worker_visits.items():
+                visits[move] = visits.get(move, 0) + count
+    move = max(visits, key=visits.get)
+    return game.cell(move)
+
+
+def pool(workers):
+    """
+    Returns the shared process pool, started with `workers` processes
+    the first time and again whenever that number changes.
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def _search(args):
+    m, n, k, state, iterations, budget, seed = args
+    return search(game_for(m, n, k), state, iterations, budget, seed)
+
+
+def search(game, state, iterations=None, budget=1.0, seed=None):
+    """
+    Grows a search tree from `state` for `iterations` playouts, or for
+    `budget` seconds if `iterations` is None, with random moves seeded
+    by `seed` (fresh ones if None). Returns a dict mapping each root move,
+    as a one-bit mask, to its visit count.
+    """
+    rng = random.Random(seed)
+    x, o = state
+    own, other = (x, o) if game.player(state) == X else (o, x)
+    root = TreeNode(own, other, None, None, None)
+    root.untried = _empty_cells(game, own | other, rng)
+
+    deadline = time.perf_counter() + budget
+    done = 0
+    while iterations is None or done < iterations:
+        if iterations is None and time.perf_counter() > deadline:
+            break
+        node = root
+
+        # Select
+        while not node.untried and node.children:
+            node = select(node)
+
+        # Expand
+        if node.untried:
+            node = expand(game, node, rng)
+
+        # Simulate, from the view of the player who moved into the node
+        result = playout(game, node, rng)
+
+        # Backpropagate
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1 - result
+            node = node.parent
+        done += 1
+
+    search_stats["nodes"] += done
+    return {child.move: child.visits for child in root.children}
+
+
+def select(node):
+    """
+    Returns the child of `node` with the highest UCT score.
+    """
+    log_visits = math.log(node.visits)
+    best, best_score = None, -math.inf
+    for child in node.children:
+        score = (child.wins / child.visits
+                 + EXPLORATION * math.sqrt(log_visits / child.visits))
+        if score > best_score:
+            best, best_score = child, score
+    return best
+
+
+def expand(game, node, rng):
+    """
+    Adds a child of `node` for one of its untried moves and returns it.
+    """
+    bit = node.untried.pop()
+    own = node.own | bit
+    taken = own | node.other
+    if any(own & mask == mask for mask in game.lines_through[bit]):
+        done = 1
+    elif taken == game.full:
+        done = 0.5
+    else:
+        done = None
+    child = TreeNode(node.other, own, bit, node, done)
+    if done is None:
+        child.untried = _empty_cells(game, taken, rng)
+    node.children.append(child)
+    return child
+
+
+def playout(game, node, rng):
+    """
+    Finishes the game from `node` with random moves. Returns 1 if the
+    player who moved into `node` wins, 0 if they lose and 0.5 for a draw.
+    """
+    if node.done is not None:
+        return node.done
+
+    # players[0] is the player to move at `node`
+    players = [node.own, node.other]
+    turn = 0
+    lines_through = game.lines_through
+    for bit in _empty_cells(game, node.own | node.other, rng):
+        cells = players[turn] | bit
+        players[turn] = cells
+        for mask in lines_through[bit]:
+            if cells & mask == mask:
+                return 0 if turn == 0 else 1
+        turn = 1 - turn
+    return 0.5
+
+
+def _empty_cells(game, taken, rng):
+    """Returns the empty cells as one-bit masks, in random order."""
+    cells = [1 << c for c in range(game.m * game.n) if not taken >> c & 1]
+    rng.shuffle(cells)
+    return cells
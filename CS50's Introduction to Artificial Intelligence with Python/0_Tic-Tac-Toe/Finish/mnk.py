@@ -0,0 +1,323 @@
+"""
+m,n,k-game Player: tic-tac-toe on an m-row, n-column board, where the
+first player to get k in a row (across, down or diagonally) wins.
+
+Full-depth minimax is out of reach beyond 3x3, so moves are chosen by
+iterative deepening alpha-beta search. Each pass searches one move deeper
+than the last until the time budget runs out, and the best move of the
+last finished pass is played. Positions at the depth limit are scored by
+a heuristic that counts the lines each player could still complete.
+
+States are (x, o) pairs of ints with bit n * i + j set when that player
+holds cell (i, j), as in bitboard.py.
+"""
+
+import math
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score of a won position; wins found sooner score higher
+WIN = 10 ** 9
+
+# How often, in searched positions, the clock is checked
+CLOCK_INTERVAL = 256
+
+# Boards with more cells only search moves next to taken cells, which
+# makes the search much narrower but no longer exhaustive
+NEAR_ONLY_CELLS = 16
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Game():
+
+    def __init__(self, m=3, n=3, k=3):
+        """
+        Initialize a game on an `m` by `n` board won by `k` in a row.
+        """
+        if not 1 <= k <= max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.full = (1 << (m * n)) - 1
+
+        # Every run of k cells in a line, and the runs through each cell
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if not (0 <= end_i < m and 0 <= end_j < n):
+                        continue
+                    mask = 0
+                    for step in range(k):
+                        mask |= self.bit(i + di * step, j + dj * step)
+                    self.lines.append(mask)
+        self.lines_through = {}
+        for cell in range(m * n):
+            self.lines_through[1 << cell] = [
+                mask for mask in self.lines if mask >> cell & 1
+            ]
+
+        # Cells next to each cell, which are the only ones searched on
+        # large boards once they are not empty
+        self.near_only = m * n > NEAR_ONLY_CELLS
+        self.near = {}
+        for i in range(m):
+            for j in range(n):
+                mask = 0
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        if 0 <= i + di < m and 0 <= j + dj < n:
+                            mask |= self.bit(i + di, j + dj)
+                self.near[self.bit(i, j)] = mask
+
+        # Cells in search order, closest to the center first
+        center_i, center_j = (m - 1) / 2, (n - 1) / 2
+        cells = sorted(((i, j) for i in range(m) for j in range(n)),
+                       key=lambda c: (abs(c[0] - center_i)
+                                      + abs(c[1] - center_j)))
+        self.order = [self.bit(i, j) for i, j in cells]
+
+        # Heuristic value of a line holding only `count` of one player's
+        # cells
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        # Number of positions searched so far, and how the last
+        # search went
+        self.nodes = 0
+        self.stats = {}
+        self._deadline = math.inf
+
+    def bit(self, i, j):
+        return 1 << (self.n * i + j)
+
+    def cell(self, bit):
+        """Returns the (i, j) cell of a one-bit mask."""
+        return divmod(bit.bit_length() - 1, self.n)
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return (0, 0)
+
+    def player(self, state):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = state
+        return X if _count(x) == _count(o) else O
+
+    def actions(self, state):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        taken = state[0] | state[1]
+        return {divmod(c, self.n) for c in range(self.m * self.n)
+                if not taken >> c & 1}
+
+    def result(self, state, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n):
+            raise Exception("not a valid action")
+        x, o = state
+        bit = self.bit(i, j)
+        if (x | o) & bit:
+            raise Exception("not a valid action")
+        if _count(x) == _count(o):
+            return (x | bit, o)
+        return (x, o | bit)
+
+    def winner(self, state):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = state
+        for mask in self.lines:
+            if x & mask == mask:
+                return X
+            if o & mask == mask:
+                return O
+        return None
+
+    def terminal(self, state):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(state) is not None
+                or state[0] | state[1] == self.full)
+
+    def utility(self, state):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        win = self.winner(state)
+        if win == X:
+            return 1
+        if win == O:
+            return -1
+        return 0
+
+    def minimax(self, state, budget=1.0, max_depth=None):
+        """
+        Returns the best action found for the current player within
+        `budget` seconds, searching at most `max_depth` moves ahead.
+        The first pass (one move deep) always completes.
+        """
+        if self.terminal(state):
+            return None
+
+        start = time.perf_counter()
+        x, o = state
+        own, other = (x, o) if _count(x) == _count(o) else (o, x)
+        moves = self.candidates(own | other)
+        empty = self.m * self.n - _count(own | other)
+        if max_depth is None:
+            max_depth = empty
+        nodes = self.nodes
+
+        best_move, value, depth = moves[0], 0, 0
+        self._deadline = math.inf
+        while depth < min(max_depth, empty) and len(moves) > 1:
+            try:
+                move, v = self.search_root(own, other, depth + 1, moves)
+            except SearchTimeout:
+                break
+            best_move, value, depth = move, v, depth + 1
+            # Search the best move first next time
+            moves.remove(move)
+            moves.insert(0, move)
+            # A forced win or loss will not change with more depth
+            if abs(value) > WIN // 2:
+                break
+            self._deadline = start + budget
+
+        self.stats = {
+            "depth": depth,
+            "value": value,
+            "nodes": self.nodes - nodes,
+            "seconds": time.perf_counter() - start
+        }
+        return self.cell(best_move)
+
+    def search_root(self, own, other, depth, moves):
+        """
+        Returns (move, value) of the best of `moves` for the player to
+        move, who holds `own`, searching `depth` moves ahead.
+        """
+        alpha, beta = -math.inf, math.inf
+        best_move = moves[0]
+        for bit in moves:
+            v = -self.negamax(other, own | bit, bit, depth - 1,
+                              -beta, -alpha, 1)
+            if v > alpha:
+                alpha, best_move = v, bit
+        return best_move, alpha
+
+    def negamax(self, own, other, last, depth, alpha, beta, ply):
+        """
+        Returns the value of a position for the player to move, who holds
+        `own`, after the opponent played `last`, searching `depth` moves
+        ahead, `ply` moves below the root.
+        """
+        self.nodes += 1
+        if (self.nodes % CLOCK_INTERVAL == 0
+                and time.perf_counter() > self._deadline):
+            raise SearchTimeout
+
+        # Only the opponent's last move can have completed a line
+        for mask in self.lines_through[last]:
+            if other & mask == mask:
+                return -(WIN - ply)
+        taken = own | other
+        if taken == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(own, other)
+
+        best = -math.inf
+        for bit in self.candidates(taken):
+            v = -self.negamax(other, own | bit, bit, depth - 1,
+                              -beta, -alpha, ply + 1)
+            if v > best:
+                best = v
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+        return best
+
+    def candidates(self, taken):
+        """
+        Returns the cells worth searching, as one-bit masks in search
+        order: on large boards only empty cells next to a taken cell, or
+        the center of an empty board, otherwise every empty cell.
+        """
+        if not self.near_only:
+            return [bit for bit in self.order if not taken & bit]
+        if not taken:
+            return self.order[:1]
+        near = 0
+        rest = taken
+        while rest:
+            bit = rest & -rest
+            near |= self.near[bit]
+            rest ^= bit
+        near &= ~taken
+        return [bit for bit in self.order if near & bit]
+
+    def evaluate(self, own, other):
+        """
+        Returns a heuristic value of a position for the player to move,
+        who holds `own`: lines only one player has cells in count for
+        that player, more so the fuller they are.
+        """
+        weights = self.weights
+        score = 0
+        for mask in self.lines:
+            mine = own & mask
+            theirs = other & mask
+            if mine and not theirs:
+                score += weights[_count(mine)]
+            elif theirs and not mine:
+                score -= weights[_count(theirs)]
+        return score
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) state of a list-of-lists board.
+        """
+        x = o = 0
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] == X:
+                    x |= self.bit(i, j)
+                elif board[i][j] == O:
+                    o |= self.bit(i, j)
+        return (x, o)
+
+    def to_board(self, state):
+        """
+        Returns the list-of-lists board of an (x, o) state.
+        """
+        x, o = state
+        board = []
+        for i in range(self.m):
+            row = []
+            for j in range(self.n):
+                bit = self.bit(i, j)
+                row.append(X if x & bit else O if o & bit else EMPTY)
+            board.append(row)
+        return board
+
+
+def _count(mask):
+    return bin(mask).count("1")
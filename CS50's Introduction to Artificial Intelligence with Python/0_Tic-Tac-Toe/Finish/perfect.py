@@ -0,0 +1,147 @@
+"""
+Perfect-play table for 3x3 tic-tac-toe.
+
+Every board is numbered by its base-3 encoding, the sum over cells
+n = 3 * i + j of digit * 3 ** n with EMPTY = 0, X = 1 and O = 2. The table
+holds one byte per number: the minimax value of the board plus one in the
+high four bits and the cell of a best move in the low four, or ILLEGAL for
+numbers that are not reachable boards.
+
+It is built by retrograde analysis: boards are solved from the fullest to
+the emptiest, so every child is solved before its parent and each of the
+5,478 legal boards is looked at once. Run this file to write the table;
+`lookup` loads it lazily, building it first if the file is missing.
+
+Usage: python perfect.py [path]
+"""
+
+import os
+import sys
+
+SIZE = 3 ** 9
+ILLEGAL = 0xFF
+NO_MOVE = 0x0F
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    "perfect.table")
+
+POWERS = [3 ** n for n in range(9)]
+LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6))
+
+# Cells tried first to last, so ties go to the center, then corners
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+_table = None
+
+
+def build():
+    """
+    Returns the table as bytes, solving every legal board.
+    """
+    table = bytearray([ILLEGAL]) * SIZE
+    levels = [[] for _ in range(10)]
+    for code in range(SIZE):
+        digits = decode(code)
+        x_count, o_count = digits.count(1), digits.count(2)
+        x_won, o_won = won(digits, 1), won(digits, 2)
+        # X moves first, and nobody moves after a win
+        if x_count - o_count not in (0, 1) or (x_won and o_won):
+            continue
+        if (x_won and x_count == o_count) or (o_won and x_count != o_count):
+            continue
+        levels[x_count + o_count].append(code)
+
+    for filled in range(9, -1, -1):
+        for code in levels[filled]:
+            digits = decode(code)
+            if won(digits, 1):
+                table[code] = 2 << 4 | NO_MOVE
+                continue
+            if won(digits, 2):
+                table[code] = 0 << 4 | NO_MOVE
+                continue
+            if filled == 9:
+                table[code] = 1 << 4 | NO_MOVE
+                continue
+
+            mover = 1 if filled % 2 == 0 else 2
+            best, best_cell = None, None
+            for cell in ORDER:
+                if digits[cell]:
+                    continue
+                v = table[code + mover * POWERS[cell]] >> 4
+                if (best is None or (mover == 1 and v > best)
+                        or (mover == 2 and v < best)):
+                    best, best_cell = v, cell
+            table[code] = best << 4 | best_cell
+    return bytes(table)
+
+
+def decode(code):
+    """Returns the 9 base-3 digits of a board number, cell 0 first."""
+    digits = []
+    for _ in range(9):
+        code, digit = divmod(code, 3)
+        digits.append(digit)
+    return digits
+
+
+def won(digits, mark):
+    return any(all(digits[n] == mark for n in line) for line in LINES)
+
+
+def save(table, path=PATH):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(table)
+    os.replace(tmp, path)
+
+
+def load(path=PATH):
+    """
+    Returns the table saved at `path`, building and saving it first if
+    there is no valid one.
+    """
+    global _table
+    try:
+        with open(path, "rb") as f:
+            table = f.read()
+    except OSError:
+        table = b""
+    if len(table) != SIZE:
+        table = build()
+        try:
+            save(table, path)
+        except OSError:
+            # Read-only installs still work, the table just lives in memory
+            pass
+    _table = table
+    return table
+
+
+def lookup(code):
+    """
+    Returns (value, cell) for a board number: its minimax value and the
+    cell of a best move, None if the game is over. Returns None for
+    numbers that are not legal boards.
+    """
+    table = _table if _table is not None else load()
+    entry = table[code]
+    if entry == ILLEGAL:
+        return None
+    cell = entry & 0x0F
+    return (entry >> 4) - 1, None if cell == NO_MOVE else cell
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python perfect.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else PATH
+    table = build()
+    save(table, path)
+    legal = sum(1 for entry in table if entry != ILLEGAL)
+    print(f"Solved {legal} positions into {path}.")
+
+
+if __name__ == "__main__":
+    main()
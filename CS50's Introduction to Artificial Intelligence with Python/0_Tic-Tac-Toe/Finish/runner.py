@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -16,17 +17,40 @@ screen = pygame.display.set_mode(size)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 20)
+
+# The AI searches in a background thread, so the window keeps drawing
+executor = ThreadPoolExecutor(max_workers=1)
+clock = pygame.time.Clock()
+fps = 60
+
+# Shortest time the AI appears to think, in seconds
+ai_delay = 0.5
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_future = None
+ai_start = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            # Only the one pending move can be queued, so cancelling it
+            # is all cancel_futures (Python 3.9+) would do
+            if ai_future is not None:
+                ai_future.cancel()
+            executor.shutdown(wait=False)
             sys.exit()
 
+        # Escape starts over, dropping any move the AI is working on
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            user = None
+            board = ttt.initial_state()
+            if ai_future is not None:
+                ai_future.cancel()
+            ai_future = None
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -110,13 +134,23 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_future is None:
+                ai_start = time.time()
+                ai_future = executor.submit(ttt.minimax, board)
+            elif (ai_future.done()
+                  and time.time() - ai_start >= ai_delay):
+                move = ai_future.result()
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                ai_future = None
+
+        # Show how long the AI has been thinking
+        if ai_future is not None:
+            thinking = smallFont.render(
+                f"{time.time() - ai_start:.1f} s (Esc to restart)", True,
+                white)
+            thinkingRect = thinking.get_rect()
+            thinkingRect.center = ((width / 2), height - 30)
+            screen.blit(thinking, thinkingRect)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +175,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai_future = None
 
     pygame.display.flip()
+    clock.tick(fps)
@@ -5,10 +5,48 @@ Tic Tac Toe Player
 import math
 import copy
 
+import perfect
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Cell order of each of the 8 rotations and reflections of the board:
+# SYMMETRIES[k][n] is the (i, j) cell that lands on cell n = 3 * i + j
+SYMMETRIES = []
+for transpose in (False, True):
+    for flip_rows in (False, True):
+        for flip_cols in (False, True):
+            cells = []
+            for n in range(9):
+                i, j = divmod(n, 3)
+                if flip_rows:
+                    i = 2 - i
+                if flip_cols:
+                    j = 2 - j
+                cells.append((j, i) if transpose else (i, j))
+            SYMMETRIES.append(cells)
+
+# Transposition table: maps the canonical encoding of a position to its
+# (value, bound), shared by every search. Alpha-beta cut-offs leave some
+# values as only a lower or upper bound on the true minimax value
+EXACT, LOWER, UPPER = range(3)
+transpositions = {}
+table_stats = {"hits": 0, "misses": 0}
+
+# Cells tried first to last: center, corners, then edges
+CELL_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Maps a number of empty cells to the last move that caused a cut-off
+# with that many cells left, tried first in sibling positions
+killers = {}
+
+# Number of positions searched so far, over every search
+search_stats = {"nodes": 0}
+
+_DIGITS = {EMPTY: 0, X: 1, O: 2}
+
 
 def initial_state():
     """
@@ -132,56 +170,191 @@ def utility(board):
 
 def minimax(board):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board,
+    looked up in the perfect-play table (see perfect.py).
+    """
+    if terminal(board):
+        return None
+
+    entry = perfect.lookup(encode(board))
+    if entry is None:
+        # Not a board reachable in play, so not in the table
+        return search(board)
+    return divmod(entry[1], 3)
+
+
+def search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    found by alpha-beta search.
     """
     if terminal(board):
         return None
 
     turn = player(board)
-    actions_set = actions(board)
-    if turn == X:
-        action = actions_set.pop()
-        action_result = min_value(result(board, action))
+    alpha, beta = -math.inf, math.inf
+    best_action = None
+    for action in ordered_actions(board):
+        if turn == X:
+            v = min_value(result(board, action), alpha, beta)
+            if best_action is None or v > alpha:
+                best_action, alpha = action, v
+        else:
+            v = max_value(result(board, action), alpha, beta)
+            if best_action is None or v < beta:
+                best_action, beta = action, v
+        # Nothing beats a win
+        if alpha == 1 or beta == -1:
+            break
+    return best_action
 
-        for a in actions_set:
-            if min_value(result(board, a)) > action_result:
-                action = a
-        return action
 
-    if turn == O:
-        action = actions_set.pop()
-        action_result = max_value(result(board, action))
+def max_value(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the value of the board for X, exact if it lies between
+    `alpha` and `beta`, otherwise a bound beyond them.
+    """
+    search_stats["nodes"] += 1
+    if terminal(board):
+        return utility(board)
 
-        for a in actions_set:
-            if max_value(result(board, a)) < action_result:
-                action = a
-        return action
+    key = canonical(board)
+    known = probe(key, alpha, beta)
+    if known is not None:
+        return known
+
+    v = -math.inf
+    lowest = alpha
+    moves = ordered_actions(board)
+    for action in moves:
+        v = max(v, min_value(result(board, action), alpha, beta))
+        if v >= beta:
+            killers[len(moves)] = action
+            break
+        alpha = max(alpha, v)
 
+    store(key, v, lowest, beta)
+    return v
 
-def max_value(board):
 
+def min_value(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the value of the board for X, exact if it lies between
+    `alpha` and `beta`, otherwise a bound beyond them.
+    """
+    search_stats["nodes"] += 1
     if terminal(board):
         return utility(board)
 
-    v = float('-inf')
-
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
+    key = canonical(board)
+    known = probe(key, alpha, beta)
+    if known is not None:
+        return known
+
+    v = math.inf
+    highest = beta
+    moves = ordered_actions(board)
+    for action in moves:
+        v = min(v, max_value(result(board, action), alpha, beta))
+        if v <= alpha:
+            killers[len(moves)] = action
+            break
+        beta = min(beta, v)
 
+    store(key, v, alpha, highest)
     return v
 
 
-def min_value(board):
+def ordered_actions(board):
+    """
+    Returns the possible actions on the board in search order: the
+    killer move for this depth if it is possible, then the center,
+    corners and edges.
+    """
+    moves = [(i, j) for i, j in CELL_ORDER if board[i][j] is EMPTY]
+    killer = killers.get(len(moves))
+    if killer in moves and moves[0] != killer:
+        moves.remove(killer)
+        moves.insert(0, killer)
+    return moves
 
-    if terminal(board):
-        return utility(board)
 
-    v = float('inf')
+def probe(key, alpha, beta):
+    """
+    Returns the value stored for `key` if it settles a search between
+    `alpha` and `beta`, otherwise None.
+    """
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, bound = entry
+        if (bound == EXACT or (bound == LOWER and value >= beta)
+                or (bound == UPPER and value <= alpha)):
+            table_stats["hits"] += 1
+            return value
+    table_stats["misses"] += 1
+    return None
 
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
 
-    return v
+def store(key, value, alpha, beta):
+    """
+    Records the value a search between `alpha` and `beta` found for `key`.
+    """
+    if value <= alpha:
+        transpositions[key] = (value, UPPER)
+    elif value >= beta:
+        transpositions[key] = (value, LOWER)
+    else:
+        transpositions[key] = (value, EXACT)
+
+
+def encode(board):
+    """
+    Returns the base-3 number of the board used by perfect.py.
+    """
+    code = 0
+    for n in range(8, -1, -1):
+        code = code * 3 + _DIGITS[board[n // 3][n % 3]]
+    return code
+
+
+def canonical(board):
+    """
+    Returns the smallest base-3 encoding of the board over its 8
+    rotations and reflections, which all share one minimax value.
+    """
+    best = None
+    for cells in SYMMETRIES:
+        code = 0
+        for i, j in cells:
+            code = code * 3 + _DIGITS[board[i][j]]
+        if best is None or code < best:
+            best = code
+    return best
+
+
+def table_report():
+    """
+    Returns the size of the transposition table and its hit rate.
+    """
+    lookups = table_stats["hits"] + table_stats["misses"]
+    return {
+        "entries": len(transpositions),
+        "hits": table_stats["hits"],
+        "misses": table_stats["misses"],
+        "hit_rate": table_stats["hits"] / lookups if lookups else 0
+    }
+
+
+def clear_table():
+    """
+    Empties the transposition table and killer moves and resets the
+    counters.
+    """
+    transpositions.clear()
+    killers.clear()
+    table_stats["hits"] = 0
+    table_stats["misses"] = 0
+    search_stats["nodes"] = 0
 
 
 
@@ -0,0 +1,290 @@
+"""
+Plays tic-tac-toe engines against each other without a window.
+
+Every ordered pair of engines plays the given number of games, spread over
+a process pool. Each game starts from a few random moves so deterministic
+engines do not replay one game. Reports results per pairing and, per
+engine, moves per second, positions searched per move and move latency
+percentiles.
+
+Every engine move is checked against an oracle: a plain memoized minimax
+over every reachable board, sharing no code with the engines beyond the
+rules in tictactoe.py. A move is optimal when it keeps the minimax value of
+the board. The perfect-play table the "table" engine plays from is itself
+checked against the oracle before any game starts. "minimax" is the
+original full-depth search without memoization or pruning; its root only
+compares moves with the first one tried, so it can miss the best move,
+and only it and random should ever make suboptimal moves.
+
+Usage: python tournament.py [--games=N] [--workers=N] [--engines=a,b]
+                            [--opening=N] [--seed=N]
+"""
+
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import mcts
+import mnk
+import perfect
+import tictactoe as ttt
+
+_mnk_game = mnk.Game()
+
+# Minimax value of every board the oracle has solved, by its cells
+_values = {}
+
+# Number of positions searched by the original minimax
+_minimax_stats = {"nodes": 0}
+
+
+def oracle_value(board):
+    """
+    Returns the minimax value of a board for X, by full minimax search
+    memoized on the board's cells.
+    """
+    key = tuple(map(tuple, board))
+    if key not in _values:
+        if ttt.terminal(board):
+            value = ttt.utility(board)
+        else:
+            values = [oracle_value(ttt.result(board, action))
+                      for action in ttt.actions(board)]
+            value = max(values) if ttt.player(board) == ttt.X else min(values)
+        _values[key] = value
+    return _values[key]
+
+
+def check_table():
+    """
+    Compares the value and move of every board in the perfect-play table
+    with the oracle. Returns (positions checked, list of boards where
+    they disagree).
+    """
+    oracle_value(ttt.initial_state())
+    wrong = []
+    for key, value in _values.items():
+        board = [list(row) for row in key]
+        entry = perfect.lookup(ttt.encode(board))
+        if entry is None or entry[0] != value:
+            wrong.append(board)
+        elif entry[1] is not None:
+            child = ttt.result(board, divmod(entry[1], 3))
+            if oracle_value(child) != value:
+                wrong.append(board)
+    return len(_values), wrong
+
+
+def _original_minimax(board, rng):
+    """
+    The first minimax of tictactoe.py, kept as it was to measure the
+    others against.
+    """
+    if ttt.terminal(board):
+        return None
+
+    turn = ttt.player(board)
+    actions_set = ttt.actions(board)
+    if turn == ttt.X:
+        action = actions_set.pop()
+        action_result = _min_value(ttt.result(board, action))
+
+        for a in actions_set:
+            if _min_value(ttt.result(board, a)) > action_result:
+                action = a
+        return action
+
+    action = actions_set.pop()
+    action_result = _max_value(ttt.result(board, action))
+
+    for a in actions_set:
+        if _max_value(ttt.result(board, a)) < action_result:
+            action = a
+    return action
+
+
+def _max_value(board):
+    _minimax_stats["nodes"] += 1
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    v = float("-inf")
+    for action in ttt.actions(board):
+        v = max(v, _min_value(ttt.result(board, action)))
+    return v
+
+
+def _min_value(board):
+    _minimax_stats["nodes"] += 1
+    if ttt.terminal(board):
+        return ttt.utility(board)
+    v = float("inf")
+    for action in ttt.actions(board):
+        v = min(v, _max_value(ttt.result(board, action)))
+    return v
+
+
+def _random_move(board, rng):
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+def _bitboard_move(board, rng):
+    return bitboard.minimax(bitboard.from_board(board))
+
+
+def _mnk_move(board, rng):
+    return _mnk_game.minimax(_mnk_game.from_board(board), budget=0.1)
+
+
+def _mcts_move(board, rng):
+    return mcts.minimax(board, iterations=2000, seed=rng.getrandbits(32))
+
+
+# Maps engine names to (move function, counter of positions searched)
+ENGINES = {
+    "minimax": (_original_minimax, lambda: _minimax_stats["nodes"]),
+    "table": (lambda board, rng: ttt.minimax(board), lambda: 0),
+    "search": (lambda board, rng: ttt.search(board),
+               lambda: ttt.search_stats["nodes"]),
+    "bitboard": (_bitboard_move, lambda: bitboard.search_stats["nodes"]),
+    "mnk": (_mnk_move, lambda: _mnk_game.nodes),
+    "mcts": (_mcts_move, lambda: mcts.search_stats["nodes"]),
+    "random": (_random_move, lambda: 0)
+}
+
+
+def play(x_engine, o_engine, seed, opening=2):
+    """
+    Plays one game, starting with `opening` random moves (at most 4, so
+    nobody has won yet). Returns (winner, moves), where moves lists
+    (engine, seconds, positions searched, optimal) for every engine move.
+    """
+    rng = random.Random(seed)
+    board = ttt.initial_state()
+    for _ in range(min(opening, 4)):
+        board = ttt.result(board, _random_move(board, rng))
+
+    engines = {ttt.X: x_engine, ttt.O: o_engine}
+    moves = []
+    while not ttt.terminal(board):
+        name = engines[ttt.player(board)]
+        move, nodes = ENGINES[name]
+        before = nodes()
+        start = time.perf_counter()
+        action = move(board, rng)
+        elapsed = time.perf_counter() - start
+        searched = nodes() - before
+
+        value = oracle_value(board)
+        board = ttt.result(board, action)
+        optimal = oracle_value(board) == value
+        moves.append((name, elapsed, searched, optimal))
+    return ttt.winner(board), moves
+
+
+def _play(args):
+    return args[0], args[1], play(*args)
+
+
+def tournament(engines, games=100, workers=None, opening=2, seed=0):
+    """
+    Plays `games` games for every ordered pair of `engines` in `workers`
+    processes (all cores if None). Returns (results, moves, seconds):
+    results maps each (x engine, o engine) pair to a Counter of winners,
+    and moves maps each engine to its list of move records.
+    """
+    matches = [(x, o, seed * 1000003 + i, opening)
+               for x in engines for o in engines for i in range(games)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        played = [_play(match) for match in matches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            played = list(pool.map(_play, matches, chunksize=16))
+    seconds = time.perf_counter() - start
+
+    results = {(x, o): Counter() for x in engines for o in engines}
+    moves = {name: [] for name in engines}
+    for x, o, (winner, game_moves) in played:
+        results[(x, o)][winner] += 1
+        for record in game_moves:
+            moves[record[0]].append(record)
+    return results, moves, seconds
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    usage = ("Usage: python tournament.py [--games=N] [--workers=N] "
+             "[--engines=a,b] [--opening=N] [--seed=N]")
+    games, workers, opening, seed = 100, None, 2, 0
+    engines = list(ENGINES)
+    try:
+        for arg in sys.argv[1:]:
+            if arg.startswith("--games="):
+                games = int(arg.split("=", 1)[1])
+            elif arg.startswith("--workers="):
+                workers = int(arg.split("=", 1)[1])
+            elif arg.startswith("--engines="):
+                engines = arg.split("=", 1)[1].split(",")
+            elif arg.startswith("--opening="):
+                opening = int(arg.split("=", 1)[1])
+            elif arg.startswith("--seed="):
+                seed = int(arg.split("=", 1)[1])
+            else:
+                sys.exit(usage)
+    except ValueError:
+        sys.exit(usage)
+    for name in engines:
+        if name not in ENGINES:
+            sys.exit(f"Unknown engine {name}, choose from "
+                     f"{', '.join(ENGINES)}")
+
+    # Solve every board once here rather than in every worker
+    positions, wrong = check_table()
+    if wrong:
+        sys.exit(f"The perfect-play table disagrees with the oracle on "
+                 f"{len(wrong)} of {positions} positions")
+    print(f"Perfect-play table matches the oracle on {positions} "
+          "positions.")
+    results, moves, seconds = tournament(engines, games, workers, opening,
+                                         seed)
+    total = sum(sum(counts.values()) for counts in results.values())
+    print(f"{total} games in {seconds:.2f} s "
+          f"({total / seconds:.0f} games per second)")
+    print()
+
+    print(f"{'X':<10}{'O':<10}{'X wins':>8}{'draws':>8}{'O wins':>8}")
+    for (x, o), counts in results.items():
+        print(f"{x:<10}{o:<10}{counts[ttt.X]:>8}{counts[None]:>8}"
+              f"{counts[ttt.O]:>8}")
+    print()
+
+    print(f"{'engine':<10}{'moves':>8}{'moves/s':>10}{'nodes/move':>12}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'suboptimal':>12}")
+    for name in engines:
+        records = moves[name]
+        if not records:
+            continue
+        latencies = sorted(record[1] for record in records)
+        busy = sum(latencies)
+        nodes = sum(record[2] for record in records)
+        suboptimal = sum(1 for record in records if not record[3])
+        print(f"{name:<10}{len(records):>8}"
+              f"{len(records) / busy if busy else 0:>10.0f}"
+              f"{nodes / len(records):>12.1f}"
+              f"{1000 * percentile(latencies, 0.50):>9.3f}"
+              f"{1000 * percentile(latencies, 0.99):>9.3f}"
+              f"{1000 * latencies[-1]:>9.3f}{suboptimal:>12}")
+
+
+if __name__ == "__main__":
+    main()
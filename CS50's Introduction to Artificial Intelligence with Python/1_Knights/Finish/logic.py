@@ -1,5 +1,9 @@
 import itertools
 
+# Most symbols the "vector" engine handles: its truth tables take
+# 2 ** symbols bits
+MAX_VECTOR_SYMBOLS = 24
+
 
 class Sentence():
 
@@ -225,8 +229,27 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def model_check(knowledge, query, engine="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    The "enumerate" engine tries every model; the "vector" engine
+    evaluates both sentences over every model at once as truth tables;
+    the "sat" engine instead checks that knowledge ∧ ¬query has no model
+    with a SAT solver, which scales to far more symbols.
+    """
+    if engine == "sat":
+        return satisfiable(And(knowledge, Not(query))) is None
+    if engine == "vector":
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        full = (1 << (1 << len(symbols))) - 1
+        tables = {}
+        knowledge_table = truth_table(knowledge, symbols, tables)
+        query_table = truth_table(query, symbols, tables)
+        # Every model of the knowledge base must be a model of the query
+        return knowledge_table & (full ^ query_table) == 0
+    if engine != "enumerate":
+        raise ValueError(f"unknown model checking engine {engine!r}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -261,3 +284,275 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def truth_table(sentence, symbols, tables=None):
+    """
+    Returns the truth table of a sentence over every model of the symbol
+    names in `symbols`, packed into an int: bit m is the sentence's value
+    in the model where symbol i is true if bit i of m is set. Each
+    connective is then a single operation on whole tables. `tables` may
+    be a dict shared between calls, to reuse subformulas' tables.
+    """
+    if len(symbols) > MAX_VECTOR_SYMBOLS:
+        raise ValueError(f"truth tables support at most "
+                         f"{MAX_VECTOR_SYMBOLS} symbols")
+    size = 1 << len(symbols)
+    full = (1 << size) - 1
+    if tables is None:
+        tables = {}
+
+    def column(i):
+        """Returns the table of symbol i: runs of 2 ** i zeros and ones."""
+        run = 1 << i
+        table = ((1 << run) - 1) << run
+        length = 2 * run
+        while length < size:
+            table |= table << length
+            length *= 2
+        return table
+
+    def table(s):
+        if s in tables:
+            return tables[s]
+        if isinstance(s, Symbol):
+            try:
+                result = column(symbols.index(s.name))
+            except ValueError:
+                raise Exception(f"variable {s.name} not in model")
+        elif isinstance(s, Not):
+            result = full ^ table(s.operand)
+        elif isinstance(s, And):
+            result = full
+            for conjunct in s.conjuncts:
+                result &= table(conjunct)
+        elif isinstance(s, Or):
+            result = 0
+            for disjunct in s.disjuncts:
+                result |= table(disjunct)
+        elif isinstance(s, Implication):
+            result = (full ^ table(s.antecedent)) | table(s.consequent)
+        elif isinstance(s, Biconditional):
+            result = full ^ (table(s.left) ^ table(s.right))
+        else:
+            raise TypeError("must be a logical sentence")
+        tables[s] = result
+        return result
+
+    return table(sentence)
+
+
+def satisfiable(sentence):
+    """
+    Returns a model (a dict of symbol names to booleans) in which the
+    sentence is true, or None if there is none.
+    """
+    clauses, variables = to_cnf(sentence)
+    values = dpll(clauses, variables.count)
+    if values is None:
+        return None
+    return {name: bool(values[var]) for name, var in variables.items()}
+
+
+class Variables(dict):
+    """
+    Maps symbol names to CNF variables, numbered from 1, and hands out
+    fresh variables for subformulas.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def new(self):
+        self.count += 1
+        return self.count
+
+    def of(self, name):
+        if name not in self:
+            self[name] = self.new()
+        return self[name]
+
+
+def to_cnf(sentence):
+    """
+    Converts a sentence to an equisatisfiable list of clauses by the
+    Tseitin encoding: every connective gets a fresh variable with clauses
+    tying it to its operands, so the result grows linearly with the
+    sentence. Clauses are lists of nonzero ints, -v meaning not v.
+
+    Returns (clauses, variables), variables mapping symbol names to ints.
+    """
+    clauses = []
+    variables = Variables()
+    literals = {}
+
+    def literal(s):
+        """Returns the literal that is true exactly when `s` is."""
+        if s in literals:
+            return literals[s]
+        if isinstance(s, Symbol):
+            lit = variables.of(s.name)
+        elif isinstance(s, Not):
+            lit = -literal(s.operand)
+        elif isinstance(s, (And, Or)):
+            operands = [literal(operand) for operand in
+                        (s.conjuncts if isinstance(s, And) else s.disjuncts)]
+            # And: lit => each operand, all operands => lit
+            # Or is the negation of the And of the negated operands
+            sign = 1 if isinstance(s, And) else -1
+            lit = variables.new()
+            for operand in operands:
+                clauses.append([-lit, sign * operand])
+            clauses.append([lit] + [-sign * operand for operand in operands])
+            lit *= sign
+        elif isinstance(s, Implication):
+            a, b = literal(s.antecedent), literal(s.consequent)
+            lit = variables.new()
+            clauses.extend([[-lit, -a, b], [lit, a], [lit, -b]])
+        elif isinstance(s, Biconditional):
+            a, b = literal(s.left), literal(s.right)
+            lit = variables.new()
+            clauses.extend([[-lit, -a, b], [-lit, a, -b],
+                            [lit, a, b], [lit, -a, -b]])
+        else:
+            raise TypeError("must be a logical sentence")
+        literals[s] = lit
+        return lit
+
+    clauses.append([literal(sentence)])
+    return clauses, variables
+
+
+def dpll(clauses, num_vars):
+    """
+    Returns a list of booleans indexed by variable (index 0 unused) that
+    satisfies every clause, or None if the clauses are unsatisfiable.
+
+    Davis-Putnam-Logemann-Loveland search: pure literals are set up
+    front, then variables are chosen by how often they occur and the
+    consequences of every choice are found by unit propagation. Each
+    clause watches two of its literals and is only looked at when one of
+    them becomes false.
+    """
+    values = [None] * (num_vars + 1)
+
+    def value(lit):
+        v = values[abs(lit)]
+        return v if v is None or lit > 0 else not v
+
+    # Drop tautologies and repeated literals
+    simplified = []
+    for clause in clauses:
+        clause = list(dict.fromkeys(clause))
+        if any(-lit in clause for lit in clause):
+            continue
+        if not clause:
+            return None
+        simplified.append(clause)
+    clauses = simplified
+
+    # Pure literals, which only occur with one sign, can be made true
+    # without falsifying any clause
+    counts = {}
+    for clause in clauses:
+        for lit in clause:
+            counts[lit] = counts.get(lit, 0) + 1
+    trail = []
+    for lit in counts:
+        if -lit not in counts and values[abs(lit)] is None:
+            values[abs(lit)] = lit > 0
+            trail.append(lit)
+
+    # Watch the first two literals of each clause; unit clauses are
+    # queued for propagation instead
+    watches = {}
+    units = []
+    for index, clause in enumerate(clauses):
+        if len(clause) == 1:
+            units.append(clause[0])
+            continue
+        for lit in clause[:2]:
+            watches.setdefault(lit, []).append(index)
+
+    def assign(lit):
+        """Makes `lit` true, returning False if it already is false."""
+        v = value(lit)
+        if v is None:
+            values[abs(lit)] = lit > 0
+            trail.append(lit)
+            return True
+        return v
+
+    def propagate(start):
+        """
+        Finds the consequences of the assignments in trail[start:],
+        returning False on a conflict.
+        """
+        i = start
+        while i < len(trail):
+            false_lit = -trail[i]
+            i += 1
+            watching = watches.get(false_lit, [])
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                other = clause[0]
+                if value(other) is True:
+                    kept.append(index)
+                    continue
+
+                # Move the watch to a literal that is not false
+                for k in range(2, len(clause)):
+                    if value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if not assign(other):
+                        # Conflict: keep the remaining watches as they are
+                        kept.extend(watching[position + 1:])
+                        watches[false_lit] = kept
+                        return False
+            watches[false_lit] = kept
+        return True
+
+    for lit in units:
+        if not assign(lit):
+            return None
+    if not propagate(0):
+        return None
+
+    # Try the most frequent variables first, with their more common sign
+    order = sorted(range(1, num_vars + 1),
+                   key=lambda var: -(counts.get(var, 0)
+                                     + counts.get(-var, 0)))
+    # Each decision is (trail length before it, literal, flipped)
+    decisions = []
+    next_var = 0
+    while True:
+        while next_var < len(order) and values[order[next_var]] is not None:
+            next_var += 1
+        if next_var == len(order):
+            return [bool(v) for v in values]
+
+        var = order[next_var]
+        lit = var if counts.get(var, 0) >= counts.get(-var, 0) else -var
+        decisions.append((len(trail), lit, False))
+        assign(lit)
+        while not propagate(len(trail) - 1):
+            # Undo decisions until one can be flipped
+            while decisions and decisions[-1][2]:
+                decisions.pop()
+            if not decisions:
+                return None
+            start, lit, _ = decisions.pop()
+            for undone in trail[start:]:
+                values[abs(undone)] = None
+            del trail[start:]
+            decisions.append((start, -lit, True))
+            assign(-lit)
+            next_var = 0